@@ -8,21 +8,46 @@ BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"
 IMAGES_DIR = DATA_DIR / "images"
 EXPORTS_DIR = DATA_DIR / "exports"
+THUMBNAILS_DIR = IMAGES_DIR / "thumbs"
 
 # Ensure directories exist
 os.makedirs(IMAGES_DIR, exist_ok=True)
 os.makedirs(EXPORTS_DIR, exist_ok=True)
+os.makedirs(THUMBNAILS_DIR, exist_ok=True)
 
 # Database settings
 DATABASE_URI = f"sqlite:///{DATA_DIR / 'journal.db'}"
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",  # Readers don't block the writer
+    "synchronous": "NORMAL",  # Safe with WAL, avoids an fsync per commit
+    "temp_store": "MEMORY",
+    "cache_size": -64000,  # Negative value is in KiB (~64 MB)
+    "mmap_size": 268435456,  # 256 MB memory-mapped I/O
+    "wal_autocheckpoint": 1000,  # Checkpoint the WAL back into the database every 1000 pages
+    "foreign_keys": "ON",
+}
+DB_POOL_SIZE = 8  # Persistent connections kept open by the engine pool
+DB_QUERY_CACHE_SIZE = 1200  # Compiled SQL statements SQLAlchemy keeps per engine
 
 # OCR settings
 OCR_LANGUAGE = "eng"  # Language for Tesseract
 OCR_CONFIG = "--psm 6"  # Page segmentation mode: Assume single uniform block of text
+OCR_MAX_WORKERS = os.cpu_count() or 1  # Worker processes for multi-page OCR
+TESSERACT_CMD = os.environ.get("TESSERACT_CMD")  # Tesseract binary, if not on PATH
 
 # Image preprocessing settings
 IMAGE_RESIZE_WIDTH = 1800  # Width to resize images (maintain aspect ratio)
 THRESHOLD_MIN = 150  # Minimum threshold value for binary conversion
+PREPROCESS_CACHE_SIZE = 32  # Preprocessed images kept in memory, keyed by path and mtime
+DENOISE_METHOD = "median"  # Noise reduction: "none", "median", "bilateral" or "nlm" (slowest)
+
+# Export settings
+PDF_IMAGE_DPI = 150  # Resolution page images are downscaled to when embedded in PDFs
+
+# File settings
+# Copies into the data directory become hard links when on the same file
+# system; opt in, since the linked files are then shared rather than independent
+USE_HARDLINKS = os.environ.get("JOURNAL_USE_HARDLINK") == "1"
 
 # Logging
 LOG_LEVEL = "INFO"
@@ -1,38 +1,325 @@
 """Database interface for the journal application."""
 
 import logging
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Optional, Dict, Any, Tuple
+from functools import lru_cache
+from typing import List, Optional, Dict, Any, Set, Tuple, Iterable
 
-from sqlalchemy import create_engine, func, or_
-from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy import (bindparam, case, create_engine, delete, event, func, insert, inspect, lambda_stmt, 
+                        literal_column, or_, select, text)
+from sqlalchemy.orm import sessionmaker, scoped_session, selectinload
+from sqlalchemy.engine import Engine
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import QueuePool, StaticPool
 
-from ..database.models import Base, Entry, Page, Tag
-from ..config import DATABASE_URI
+from ..database.models import Base, Entry, Page, Tag, entry_tag_association, pages_fts, tag_usage
+from ..config import DATABASE_URI, SQLITE_PRAGMAS, DB_POOL_SIZE, DB_QUERY_CACHE_SIZE
 
 logger = logging.getLogger(__name__)
 
+# External-content FTS5 table over pages.text_content, kept in sync by triggers
+PAGES_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+        text_content, content='pages', content_rowid='id', tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS pages_fts_insert AFTER INSERT ON pages BEGIN
+        INSERT INTO pages_fts(rowid, text_content) VALUES (new.id, new.text_content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS pages_fts_delete AFTER DELETE ON pages BEGIN
+        INSERT INTO pages_fts(pages_fts, rowid, text_content)
+        VALUES ('delete', old.id, old.text_content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS pages_fts_update AFTER UPDATE OF text_content ON pages BEGIN
+        INSERT INTO pages_fts(pages_fts, rowid, text_content)
+        VALUES ('delete', old.id, old.text_content);
+        INSERT INTO pages_fts(rowid, text_content) VALUES (new.id, new.text_content);
+    END
+    """,
+]
+
+# Counter table of entries per tag, kept in sync with entry_tag by triggers
+TAG_USAGE_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS tag_usage (
+        tag_id INTEGER PRIMARY KEY, count INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_tag_usage_count ON tag_usage (count DESC)
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tag_usage_insert AFTER INSERT ON entry_tag
+    WHEN new.tag_id IS NOT NULL BEGIN
+        INSERT OR IGNORE INTO tag_usage (tag_id, count) VALUES (new.tag_id, 0);
+        UPDATE tag_usage SET count = count + 1 WHERE tag_id = new.tag_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tag_usage_delete AFTER DELETE ON entry_tag
+    WHEN old.tag_id IS NOT NULL BEGIN
+        UPDATE tag_usage SET count = count - 1 WHERE tag_id = old.tag_id;
+    END
+    """,
+]
+
+
+# First matching page of each listed entry, with FTS5's snippet of the match
+FTS_SNIPPETS_SQL = text("""
+    SELECT pages.entry_id, pages.page_number, snippet(pages_fts, 0, '', '', '', 10)
+    FROM pages_fts JOIN pages ON pages.id = pages_fts.rowid
+    WHERE pages_fts MATCH :phrase AND pages.entry_id IN :entry_ids
+    ORDER BY pages.entry_id, pages.page_number
+""").bindparams(bindparam('entry_ids', expanding=True))
+
+# Characters of context shown either side of a match in search snippets
+SNIPPET_CONTEXT_CHARS = 40
+
+# URIs whose database lives inside a single connection
+MEMORY_DATABASE_URIS = ('sqlite://', 'sqlite:///:memory:')
+
+# On-disk databases already set up by this process, mapped to whether
+# full-text search is available in them
+_initialized_databases: Dict[str, bool] = {}
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Apply the configured pragmas to each new SQLite connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def _create_engine(db_uri: str) -> Engine:
+    """Create an engine with the pool and connection settings for its database."""
+    engine_args = {}
+    if db_uri.startswith('sqlite'):
+        # Sessions may be used from threads other than the one that connected
+        engine_args['connect_args'] = {'check_same_thread': False}
+        
+        if db_uri in MEMORY_DATABASE_URIS:
+            # A single shared connection keeps the in-memory database alive
+            engine_args['poolclass'] = StaticPool
+        else:
+            # Keep connections open between sessions instead of reopening the file
+            engine_args['poolclass'] = QueuePool
+            engine_args['pool_size'] = DB_POOL_SIZE
+            engine_args['max_overflow'] = -1
+            
+    engine = create_engine(db_uri, query_cache_size=DB_QUERY_CACHE_SIZE, **engine_args)
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', _set_sqlite_pragmas)
+        
+    return engine
+
+
+@lru_cache(maxsize=None)
+def _get_shared_engine(db_uri: str) -> Engine:
+    """Get the process-wide engine for a database URI, creating it on first use."""
+    return _create_engine(db_uri)
+
+
+def get_engine(db_uri: str = DATABASE_URI) -> Engine:
+    """
+    Get an engine for a database URI.
+    
+    Engines for on-disk databases are shared by every DatabaseManager in the
+    process so their connection pool is reused. In-memory databases get a
+    fresh engine each time, since sharing one would share its contents.
+    
+    Args:
+        db_uri: SQLAlchemy database URI
+        
+    Returns:
+        SQLAlchemy engine
+    """
+    if db_uri in MEMORY_DATABASE_URIS:
+        return _create_engine(db_uri)
+    return _get_shared_engine(db_uri)
+
 
 class DatabaseManager:
     """Interface for database operations."""
     
     def __init__(self, db_uri: str = DATABASE_URI):
         """Initialize database connection."""
-        self.engine = create_engine(db_uri)
+        self.db_uri = db_uri
+        self.engine = get_engine(db_uri)
         self.Session = scoped_session(sessionmaker(bind=self.engine))
+        self.fts_enabled = _initialized_databases.get(db_uri, False)
         
     def initialize_database(self) -> None:
-        """Create database tables if they don't exist."""
+        """
+        Create database tables if they don't exist.
+        
+        Each on-disk database is only set up once per process; later calls
+        for the same URI return immediately.
+        """
+        if self.db_uri in _initialized_databases:
+            self.fts_enabled = _initialized_databases[self.db_uri]
+            return
+            
         Base.metadata.create_all(self.engine)
+        self._add_missing_columns()
+        self._backfill_lowercase_text()
+        
+        # create_all skips indexes on tables that already exist
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(self.engine, checkfirst=True)
+                
+        if self.engine.dialect.name == 'sqlite':
+            self._initialize_fts()
+            self._initialize_tag_usage()
+            
+        if self.db_uri not in MEMORY_DATABASE_URIS:
+            _initialized_databases[self.db_uri] = self.fts_enabled
+            
         logger.info("Database initialized successfully")
         
+    def _add_missing_columns(self) -> None:
+        """Add nullable columns introduced after an existing database was created."""
+        inspector = inspect(self.engine)
+        
+        with self.engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                existing = {column['name'] for column in inspector.get_columns(table.name)}
+                
+                for column in table.columns:
+                    if column.name in existing:
+                        continue
+                        
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    conn.execute(text(
+                        f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                    ))
+                    logger.info(f"Added column {table.name}.{column.name}")
+                    
+    def _backfill_lowercase_text(self) -> None:
+        """Fill in the lower-cased search copy for pages stored before it existed."""
+        with self.engine.begin() as conn:
+            rows = conn.execute(
+                select(Page.id, Page.text_content).where(
+                    Page.text_content_lc.is_(None), Page.text_content.isnot(None)
+                )
+            ).all()
+            
+            if rows:
+                conn.execute(
+                    Page.__table__.update().where(Page.id == bindparam('page_id')),
+                    [{'page_id': page_id, 'text_content_lc': text_content.lower()} 
+                     for page_id, text_content in rows]
+                )
+                logger.info(f"Backfilled lower-cased text for {len(rows)} pages")
+                
+    @staticmethod
+    def _lowercase(text_content: Optional[str]) -> Optional[str]:
+        """Lower-case page text for the case-insensitive search column."""
+        return text_content.lower() if text_content else None
+        
+    def _initialize_fts(self) -> None:
+        """Create the FTS5 page index and its sync triggers if they don't exist."""
+        try:
+            with self.engine.begin() as conn:
+                exists = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pages_fts'"
+                )).first() is not None
+                
+                for statement in PAGES_FTS_DDL:
+                    conn.execute(text(statement))
+                    
+                if not exists:
+                    # Index pages that were stored before the FTS table existed
+                    conn.execute(text("INSERT INTO pages_fts(pages_fts) VALUES ('rebuild')"))
+                    
+            self.fts_enabled = True
+        except SQLAlchemyError as e:
+            logger.warning(f"Full-text search unavailable, falling back to LIKE: {str(e)}")
+            self.fts_enabled = False
+            
+    def _initialize_tag_usage(self) -> None:
+        """Create the per-tag usage counter table and its sync triggers if they don't exist."""
+        with self.engine.begin() as conn:
+            exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tag_usage'"
+            )).first() is not None
+            
+            for statement in TAG_USAGE_DDL:
+                conn.execute(text(statement))
+                
+            if not exists:
+                # Count tag assignments made before the counter table existed
+                conn.execute(text(
+                    "INSERT INTO tag_usage (tag_id, count) "
+                    "SELECT tag_id, COUNT(*) FROM entry_tag WHERE tag_id IS NOT NULL GROUP BY tag_id"
+                ))
+                
+    @staticmethod
+    def _fts_phrase(query: str) -> str:
+        """Quote a user query as an FTS5 phrase with prefix matching on the last word."""
+        return '"' + query.replace('"', '""') + '"*'
+        
     def get_session(self):
         """Get a new database session."""
         return self.Session()
         
+    @contextmanager
+    def transaction(self):
+        """
+        Provide a session whose changes are committed once when the block exits.
+        
+        Use this to group several writes into a single transaction; the
+        session is rolled back if the block raises. Like the other write
+        methods it runs on the thread's shared session and leaves it open,
+        so objects returned by earlier reads stay attached and are simply
+        reloaded on next access.
+        """
+        session = self.get_session()
+        try:
+            yield session
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Transaction rolled back: {str(e)}")
+            raise
+            
+    @contextmanager
+    def read_session(self):
+        """
+        Provide a short-lived session for reads.
+        
+        The session is separate from the thread's shared session and runs
+        without an open transaction on SQLite, so its connection holds no
+        read snapshot and goes back to the pool as soon as the block exits.
+        Objects loaded through it keep their loaded attributes but cannot
+        lazy-load further relationships afterwards.
+        """
+        session = self.Session.session_factory()
+        try:
+            if self.engine.dialect.name == 'sqlite':
+                session.connection(execution_options={'isolation_level': 'AUTOCOMMIT'})
+            yield session
+        finally:
+            session.close()
+            
     def close_sessions(self) -> None:
-        """Close all sessions."""
+        """
+        Close all sessions.
+        
+        Read and write methods leave the thread's session open so returned
+        objects can still lazy-load relationships; call this at the end of
+        each request or command to release the connection back to the pool.
+        """
         self.Session.remove()
         
     # Entry CRUD operations
@@ -44,44 +331,179 @@ class DatabaseManager:
         """Create a new journal entry."""
         session = self.get_session()
         try:
-            entry = Entry(title=title, date=date or datetime.now(), mood=mood)
+            # Insert through Core to skip unit-of-work bookkeeping for the new row
+            result = session.execute(
+                insert(Entry).values(title=title, date=date or datetime.now(), mood=mood)
+            )
+            entry_id = result.inserted_primary_key[0]
             
             # Handle tags
             if tags:
-                for tag_name in tags:
-                    tag = session.query(Tag).filter_by(name=tag_name).first()
-                    if not tag:
-                        tag = Tag(name=tag_name)
-                        session.add(tag)
-                    entry.tags.append(tag)
+                tag_rows = [{'entry_id': entry_id, 'tag_id': tag.id} 
+                            for tag in self._get_or_create_tags(session, tags)]
+                session.execute(insert(entry_tag_association), tag_rows)
                     
-            session.add(entry)
             session.commit()
-            return entry.id
+            return entry_id
         except SQLAlchemyError as e:
             session.rollback()
             logger.error(f"Error creating entry: {str(e)}")
             raise
-        finally:
-            session.close()
             
     def get_entry(self, entry_id: int) -> Optional[Entry]:
         """Get an entry by ID."""
         session = self.get_session()
-        try:
-            entry = session.query(Entry).filter_by(id=entry_id).first()
-            return entry
-        finally:
-            session.close()
+        # Lambda statements are built and compiled once, then reused with new parameters
+        stmt = lambda_stmt(lambda: select(Entry).where(Entry.id == entry_id))
+        entry = session.execute(stmt).scalars().first()
+        return entry
+            
+    def get_entry_header(self, entry_id: int) -> Optional[Tuple[Optional[str], datetime]]:
+        """
+        Get just the title and date of an entry.
+        
+        Args:
+            entry_id: ID of the entry
+            
+        Returns:
+            Tuple of (title, date), or None if the entry doesn't exist
+        """
+        session = self.get_session()
+        stmt = lambda_stmt(lambda: select(Entry.title, Entry.date).where(Entry.id == entry_id))
+        row = session.execute(stmt).one_or_none()
+        return tuple(row) if row is not None else None
+        
+    def get_entry_for_view(self, entry_id: int, preview_chars: int) -> Optional[Tuple[Entry, Iterable[Any]]]:
+        """
+        Get an entry with its tags and a text preview of each page.
+        
+        Only the first preview_chars + 1 characters of each page's text are
+        read, so callers can tell whether the text was cut off. The page rows
+        are fetched from the database in batches of 10 as they are iterated.
+        
+        Args:
+            entry_id: ID of the entry
+            preview_chars: Number of characters to show per page
             
+        Returns:
+            Tuple of (entry, iterable of page rows with id, page_number,
+            image_path and preview), or None if the entry doesn't exist
+        """
+        session = self.get_session()
+        entry = session.query(Entry).options(selectinload(Entry.tags)).filter(Entry.id == entry_id).first()
+        if entry is None:
+            return None
+            
+        pages = session.execute(
+            select(
+                Page.id, 
+                Page.page_number, 
+                Page.image_path, 
+                func.substr(Page.text_content, 1, preview_chars + 1).label('preview')
+            )
+            .where(Page.entry_id == entry_id)
+            .order_by(Page.page_number)
+            .execution_options(yield_per=10)
+        )
+        return entry, pages
+        
     def get_all_entries(self) -> List[Entry]:
-        """Get all journal entries ordered by date."""
+        """
+        Get all journal entries ordered by date.
+        
+        Page text and its lower-cased copy are not loaded up front since they
+        are the only large columns; they are fetched on first access while
+        the session is open.
+        """
         session = self.get_session()
-        try:
-            entries = session.query(Entry).order_by(Entry.date.desc()).all()
-            return entries
-        finally:
-            session.close()
+        entries = session.query(Entry).options(
+            selectinload(Entry.tags), 
+            selectinload(Entry.pages).defer(Page.text_content).defer(Page.text_content_lc)
+        ).order_by(Entry.date.desc()).all()
+        return entries
+        
+    def get_entry_summaries(self, offset: int = 0, limit: Optional[int] = None) -> List[Any]:
+        """
+        Get the fields entry cards display, computed in SQL.
+        
+        The tag list, page count and first page's image path come from
+        correlated subqueries, so no tags or pages are loaded as objects.
+        
+        Args:
+            offset: Number of entries to skip
+            limit: Maximum number of entries to return (optional)
+            
+        Returns:
+            Rows with id, title, date, mood, tag_list (comma-separated tag
+            names or None), page_count and cover_path, newest first
+        """
+        tag_list = (
+            select(func.group_concat(Tag.name, ', '))
+            .join(entry_tag_association, entry_tag_association.c.tag_id == Tag.id)
+            .where(entry_tag_association.c.entry_id == Entry.id)
+            .scalar_subquery()
+        )
+        page_count = (
+            select(func.count(Page.id))
+            .where(Page.entry_id == Entry.id)
+            .scalar_subquery()
+        )
+        cover_path = (
+            select(Page.image_path)
+            .where(Page.entry_id == Entry.id)
+            .order_by(Page.page_number)
+            .limit(1)
+            .scalar_subquery()
+        )
+        
+        statement = select(
+            Entry.id, 
+            Entry.title, 
+            Entry.date, 
+            Entry.mood, 
+            tag_list.label('tag_list'), 
+            page_count.label('page_count'), 
+            cover_path.label('cover_path')
+        ).order_by(Entry.date.desc()).offset(offset)
+        
+        if limit:
+            statement = statement.limit(limit)
+            
+        session = self.get_session()
+        return session.execute(statement).all()
+        
+    def count_entries(self) -> int:
+        """Get the total number of entries."""
+        session = self.get_session()
+        return session.query(func.count(Entry.id)).scalar()
+        
+    def list_entries_summary(self, limit: Optional[int] = None) -> List[Tuple[Entry, int]]:
+        """
+        Get entries ordered by date with their page counts, for listings.
+        
+        Pages are counted in SQL rather than loaded; tags are loaded with
+        one extra query for all entries.
+        
+        Args:
+            limit: Maximum number of entries to return (optional)
+            
+        Returns:
+            List of (Entry, page count) tuples, newest first
+        """
+        session = self.get_session()
+        page_count = (
+            select(func.count(Page.id))
+            .where(Page.entry_id == Entry.id)
+            .scalar_subquery()
+        )
+        query = session.query(Entry, page_count).options(
+            selectinload(Entry.tags)
+        ).order_by(Entry.date.desc())
+        
+        if limit:
+            query = query.limit(limit)
+            
+        return [(entry, count) for entry, count in query]
             
     def update_entry(self, 
                     entry_id: int, 
@@ -105,16 +527,8 @@ class DatabaseManager:
                 
             # Update tags if provided
             if tags is not None:
-                # Clear existing tags
-                entry.tags.clear()
-                
-                # Add new tags
-                for tag_name in tags:
-                    tag = session.query(Tag).filter_by(name=tag_name).first()
-                    if not tag:
-                        tag = Tag(name=tag_name)
-                        session.add(tag)
-                    entry.tags.append(tag)
+                # Replace existing tags
+                entry.tags = self._get_or_create_tags(session, tags)
                     
             session.commit()
             return True
@@ -122,107 +536,342 @@ class DatabaseManager:
             session.rollback()
             logger.error(f"Error updating entry: {str(e)}")
             raise
-        finally:
-            session.close()
             
     def delete_entry(self, entry_id: int) -> bool:
         """Delete an entry and all its pages."""
         session = self.get_session()
         try:
-            entry = session.query(Entry).filter_by(id=entry_id).first()
-            if not entry:
+            # Delete dependent rows with one statement each rather than loading
+            # every page; this also works on databases created before the
+            # foreign keys declared ON DELETE CASCADE
+            session.execute(delete(Page).where(Page.entry_id == entry_id))
+            session.execute(
+                delete(entry_tag_association).where(entry_tag_association.c.entry_id == entry_id)
+            )
+            result = session.execute(delete(Entry).where(Entry.id == entry_id))
+            
+            if result.rowcount == 0:
+                session.rollback()
                 return False
                 
-            session.delete(entry)
             session.commit()
             return True
         except SQLAlchemyError as e:
             session.rollback()
             logger.error(f"Error deleting entry: {str(e)}")
             raise
-        finally:
-            session.close()
             
     # Page CRUD operations
     def add_page(self, 
                 entry_id: int, 
                 page_number: int, 
                 image_path: str, 
-                text_content: Optional[str] = None) -> int:
+                text_content: Optional[str] = None, 
+                image_sha256: Optional[str] = None, 
+                ocr_preprocessed: Optional[bool] = None) -> int:
         """Add a page to an entry."""
-        session = self.get_session()
-        try:
-            page = Page(
+        with self.transaction() as session:
+            return self._add_page(session, entry_id, page_number, image_path, 
+                                  text_content, image_sha256, ocr_preprocessed)
+            
+    def _add_page(self, 
+                  session, 
+                  entry_id: int, 
+                  page_number: int, 
+                  image_path: str, 
+                  text_content: Optional[str] = None, 
+                  image_sha256: Optional[str] = None, 
+                  ocr_preprocessed: Optional[bool] = None) -> int:
+        """Insert a page on an open session without committing and return its ID."""
+        # Insert through Core to skip unit-of-work bookkeeping for the new row
+        result = session.execute(
+            insert(Page).values(
                 entry_id=entry_id,
                 page_number=page_number,
                 image_path=image_path,
-                text_content=text_content
+                text_content=text_content,
+                text_content_lc=self._lowercase(text_content),
+                image_sha256=image_sha256,
+                ocr_preprocessed=ocr_preprocessed
             )
-            session.add(page)
-            session.commit()
-            return page.id
-        except SQLAlchemyError as e:
-            session.rollback()
-            logger.error(f"Error adding page: {str(e)}")
-            raise
-        finally:
-            session.close()
+        )
+        return result.inserted_primary_key[0]
+        
+    def add_pages_bulk(self, rows: List[Dict[str, Any]]) -> List[int]:
+        """
+        Add several pages in a single transaction.
+        
+        Args:
+            rows: Dicts with entry_id, page_number, image_path, text_content and
+                  optionally image_sha256 and ocr_preprocessed keys
+            
+        Returns:
+            List of created page IDs, in the same order as rows
+        """
+        if not rows:
+            return []
             
+        # bulk_insert_mappings writes the generated IDs into the dicts it is
+        # given, so insert copies and leave the caller's rows untouched
+        mappings = [
+            {**row, 'text_content_lc': self._lowercase(row.get('text_content'))}
+            for row in rows
+        ]
+        with self.transaction() as session:
+            session.bulk_insert_mappings(Page, mappings, return_defaults=True)
+            
+        return [mapping['id'] for mapping in mappings]
+            
+    def next_page_number(self, entry_id: int) -> Optional[int]:
+        """
+        Get the page number that a new page appended to an entry should use.
+        
+        Args:
+            entry_id: ID of the entry
+            
+        Returns:
+            Next page number, or None if the entry does not exist
+        """
+        session = self.get_session()
+        stmt = lambda_stmt(lambda: select(
+            func.coalesce(func.max(Page.page_number), 0) + 1
+        ).select_from(Entry).outerjoin(Page, Page.entry_id == Entry.id).where(
+            Entry.id == entry_id
+        ).group_by(Entry.id))
+        row = session.execute(stmt).first()
+        return row[0] if row else None
+        
     def get_page(self, page_id: int) -> Optional[Page]:
         """Get a page by ID."""
         session = self.get_session()
-        try:
-            page = session.query(Page).filter_by(id=page_id).first()
-            return page
-        finally:
-            session.close()
+        stmt = lambda_stmt(lambda: select(Page).where(Page.id == page_id))
+        page = session.execute(stmt).scalars().first()
+        return page
+            
+    def get_text_by_image_hash(self, image_sha256: str, preprocess: bool) -> Optional[str]:
+        """
+        Get OCR text already extracted from an identical image.
+        
+        Only text still as OCR produced it with the same preprocess setting
+        is returned; pages whose text was edited are skipped.
+        
+        Args:
+            image_sha256: SHA-256 hex digest of the image contents
+            preprocess: Whether the image would be preprocessed before OCR
+            
+        Returns:
+            Text of an existing page with the same image, or None if there is none
+        """
+        session = self.get_session()
+        stmt = lambda_stmt(lambda: select(Page.text_content).where(
+            Page.image_sha256 == image_sha256,
+            Page.ocr_preprocessed == preprocess,
+            Page.text_content != ''
+        ).limit(1))
+        return session.execute(stmt).scalar()
+        
+    def get_referenced_image_paths(self, image_paths: Iterable[str]) -> Set[str]:
+        """
+        Get which of the given image paths are used by at least one page.
+        
+        Args:
+            image_paths: Stored image paths to check
             
-    def update_page_text(self, page_id: int, text_content: str) -> bool:
-        """Update the text content of a page."""
+        Returns:
+            Set of the paths that some page references
+        """
+        image_paths = list(image_paths)
+        if not image_paths:
+            return set()
+            
+        session = self.get_session()
+        return set(session.scalars(
+            select(Page.image_path).where(Page.image_path.in_(image_paths)).distinct()
+        ))
+        
+    def update_page_text(self, 
+                         page_id: int, 
+                         text_content: str, 
+                         ocr_preprocessed: Optional[bool] = None) -> bool:
+        """
+        Update the text content of a page.
+        
+        Args:
+            page_id: ID of the page
+            text_content: New text content
+            ocr_preprocessed: Preprocess setting if the text comes straight
+                from OCR; None for edited text, which is then never reused
+                for identical images
+            
+        Returns:
+            Whether the page exists
+        """
         session = self.get_session()
         try:
-            page = session.query(Page).filter_by(id=page_id).first()
-            if not page:
-                return False
-                
-            page.text_content = text_content
+            # Update in place so the old text is never loaded into Python
+            updated = session.query(Page).filter_by(id=page_id).update(
+                {Page.text_content: text_content, 
+                 Page.text_content_lc: self._lowercase(text_content), 
+                 Page.ocr_preprocessed: ocr_preprocessed}, 
+                synchronize_session=False
+            )
             session.commit()
-            return True
+            return updated > 0
         except SQLAlchemyError as e:
             session.rollback()
             logger.error(f"Error updating page text: {str(e)}")
             raise
-        finally:
-            session.close()
             
-    def delete_page(self, page_id: int) -> bool:
-        """Delete a page."""
+    def delete_page(self, page_id: int) -> Tuple[bool, Optional[str]]:
+        """
+        Delete a page.
+        
+        The lookup, delete and check for other pages storing the same image
+        run in a single transaction.
+        
+        Args:
+            page_id: ID of the page
+            
+        Returns:
+            Tuple of (whether the page existed, its image path if no other
+            page still uses that image)
+        """
         session = self.get_session()
         try:
-            page = session.query(Page).filter_by(id=page_id).first()
-            if not page:
-                return False
+            image_path = session.execute(
+                select(Page.image_path).where(Page.id == page_id)
+            ).scalar_one_or_none()
+            if image_path is None:
+                return False, None
                 
-            session.delete(page)
+            session.execute(delete(Page).where(Page.id == page_id))
+            shared = session.execute(
+                select(Page.id).where(Page.image_path == image_path).limit(1)
+            ).first() is not None
             session.commit()
-            return True
+            return True, None if shared else image_path
         except SQLAlchemyError as e:
             session.rollback()
             logger.error(f"Error deleting page: {str(e)}")
             raise
-        finally:
-            session.close()
     
+    # Statistics
+    def compute_stats(self, top_tags: int = 10) -> Dict[str, Any]:
+        """
+        Get journal statistics in one short read session.
+        
+        Args:
+            top_tags: Number of most used tags to include
+            
+        Returns:
+            Dictionary of counts, the date range, (tag, count) tuples for the
+            most used tags and (month, count) tuples of entries per month
+        """
+        with self.read_session() as session:
+            # Get counts and date range in one statement
+            entry_count, page_count, tag_count, first_entry, last_entry = session.query(
+                select(func.count(Entry.id)).scalar_subquery(),
+                select(func.count(Page.id)).scalar_subquery(),
+                select(func.count(Tag.id)).scalar_subquery(),
+                select(func.min(Entry.date)).scalar_subquery(),
+                select(func.max(Entry.date)).scalar_subquery()
+            ).one()
+            
+            tags = self.get_most_used_tags(limit=top_tags, session=session)
+            
+            # Get entries per month
+            entries_by_month = session.query(
+                func.strftime('%Y-%m', Entry.date).label('month'),
+                func.count(Entry.id).label('count')
+            ).group_by(
+                'month'
+            ).order_by(
+                'month'
+            ).all()
+            
+        return {
+            'entry_count': entry_count,
+            'page_count': page_count,
+            'tag_count': tag_count,
+            'first_entry': first_entry,
+            'last_entry': last_entry,
+            'tags': [tuple(row) for row in tags],
+            'entries_by_month': [tuple(row) for row in entries_by_month],
+        }
+        
     # Tag operations
+    def _get_or_create_tags(self, session, tag_names: List[str]) -> List[Tag]:
+        """
+        Resolve tag names to Tag objects, creating any that don't exist yet.
+        
+        Existing tags are fetched with a single IN query and missing ones are
+        flushed together, instead of one lookup per tag.
+        
+        Args:
+            session: Active database session
+            tag_names: Tag names in the desired order (duplicates are ignored)
+            
+        Returns:
+            List of Tag objects
+        """
+        names = list(dict.fromkeys(tag_names))
+        if not names:
+            return []
+            
+        existing = {tag.name: tag for tag in 
+                    session.query(Tag).filter(Tag.name.in_(names)).all()}
+        
+        missing = [Tag(name=name) for name in names if name not in existing]
+        if missing:
+            session.add_all(missing)
+            session.flush()
+            existing.update((tag.name, tag) for tag in missing)
+            
+        return [existing[name] for name in names]
+        
     def get_all_tags(self) -> List[Tag]:
         """Get all tags."""
         session = self.get_session()
-        try:
-            tags = session.query(Tag).order_by(Tag.name).all()
-            return tags
-        finally:
-            session.close()
+        tags = session.query(Tag).order_by(Tag.name).all()
+        return tags
     
+    def get_most_used_tags(self, limit: int = 5, session=None) -> List[Tuple[str, int]]:
+        """
+        Get the tags attached to the most entries.
+        
+        On SQLite this reads the trigger-maintained tag_usage counters
+        instead of grouping the whole association table.
+        
+        Args:
+            limit: Maximum number of tags to return
+            session: Session to run the query in (defaults to the shared session)
+            
+        Returns:
+            List of (tag name, entry count) tuples, most used first
+        """
+        if session is None:
+            session = self.get_session()
+            
+        if self.engine.dialect.name == 'sqlite':
+            usage_count = tag_usage.c['count']
+            return session.query(Tag.name, usage_count).join(
+                tag_usage, tag_usage.c.tag_id == Tag.id
+            ).filter(
+                usage_count > 0
+            ).order_by(
+                usage_count.desc()
+            ).limit(limit).all()
+            
+        return session.query(
+            Tag.name, func.count(Entry.id).label('count')
+        ).join(
+            Tag.entries
+        ).group_by(
+            Tag.name
+        ).order_by(
+            func.count(Entry.id).desc()
+        ).limit(limit).all()
+        
     # Search operations
     def search_entries(self, query: Optional[str] = None, tag: Optional[str] = None) -> List[Entry]:
         """
@@ -236,29 +885,120 @@ class DatabaseManager:
             List of matching entries
         """
         session = self.get_session()
-        try:
-            # Start with base query
-            entries_query = session.query(Entry).distinct()
-            
-            # Filter by text content if query provided
-            if query:
-                entries_query = entries_query.join(Entry.pages).filter(
-                    # Search in title or text content
-                    or_(
-                        Entry.title.ilike(f'%{query}%'),
-                        Page.text_content.ilike(f'%{query}%')
+        return self._search_query(session, query, tag).options(
+            selectinload(Entry.tags), selectinload(Entry.pages).defer(Page.text_content_lc)
+        ).all()
+        
+    def search_entries_with_snippets(self, 
+                                     query: Optional[str], 
+                                     tag: Optional[str] = None) -> List[Tuple[Entry, Optional[int], Optional[str]]]:
+        """
+        Search for entries and get a snippet of the first page matching the query.
+        
+        Pages are not loaded; the snippets are cut out of the page text in SQL.
+        
+        Args:
+            query: Text to search in content
+            tag: Tag name to filter by
+            
+        Returns:
+            List of (entry, page number, snippet) tuples; the page number and
+            snippet are None for entries that only matched on their title, or
+            for every entry when there is no query
+        """
+        session = self.get_session()
+        entries = self._search_query(session, query, tag).options(
+            selectinload(Entry.tags)
+        ).all()
+        
+        snippets = self._page_snippets(session, [entry.id for entry in entries], query) if entries and query else {}
+        
+        return [(entry, *snippets.get(entry.id, (None, None))) for entry in entries]
+        
+    def _page_snippets(self, session, entry_ids: List[int], query: str) -> Dict[int, Tuple[int, str]]:
+        """
+        Find the first page of each entry containing the query and a snippet around it.
+        
+        Args:
+            session: Session to query with
+            entry_ids: IDs of the entries to look in
+            query: Text to search for
+            
+        Returns:
+            Dictionary mapping entry ID to (page number, snippet)
+        """
+        if self.fts_enabled:
+            rows = session.execute(FTS_SNIPPETS_SQL, {
+                'phrase': self._fts_phrase(query), 'entry_ids': entry_ids
+            })
+        else:
+            query_lc = query.lower()
+            position = func.instr(Page.text_content_lc, query_lc)
+            # The match position is only valid in the original text when
+            # lower-casing didn't lengthen it (str.lower never shortens text);
+            # otherwise cut the snippet from the lower-cased copy it came from
+            snippet_source = case(
+                (func.length(Page.text_content) == func.length(Page.text_content_lc), Page.text_content), 
+                else_=Page.text_content_lc
+            )
+            rows = session.execute(
+                select(
+                    Page.entry_id, 
+                    Page.page_number, 
+                    func.substr(
+                        snippet_source, 
+                        func.max(1, position - SNIPPET_CONTEXT_CHARS), 
+                        len(query) + 2 * SNIPPET_CONTEXT_CHARS
                     )
                 )
-                
-            # Filter by tag if provided
-            if tag:
-                entries_query = entries_query.join(Entry.tags).filter(
-                    Tag.name == tag
+                .where(Page.entry_id.in_(entry_ids), position > 0)
+                .order_by(Page.entry_id, Page.page_number)
+            )
+            
+        snippets = {}
+        for entry_id, page_number, snippet in rows:
+            snippets.setdefault(entry_id, (page_number, snippet))
+        return snippets
+        
+    def _search_query(self, session, query: Optional[str], tag: Optional[str]):
+        """
+        Build the filtered, ordered entry query used by the search methods.
+        
+        Args:
+            session: Session to query with
+            query: Text to search in content
+            tag: Tag name to filter by
+            
+        Returns:
+            Entry query without loader options
+        """
+        # Start with base query; filters use EXISTS so no DISTINCT pass is needed
+        entries_query = session.query(Entry)
+        
+        # Filter by text content if query provided
+        if query:
+            if self.fts_enabled:
+                matching_page_ids = select(pages_fts.c.rowid).where(
+                    literal_column('pages_fts').match(self._fts_phrase(query))
                 )
+                page_filter = Page.id.in_(matching_page_ids)
+            else:
+                # Plain LIKE on the pre-lowered column avoids lower() per row
+                page_filter = Page.text_content_lc.like(f'%{query.lower()}%')
                 
-            # Order by date (newest first)
-            entries_query = entries_query.order_by(Entry.date.desc())
-                
-            return entries_query.all()
-        finally:
-            session.close()
\ No newline at end of file
+            entries_query = entries_query.filter(
+                # Search in title or text content
+                or_(
+                    Entry.title.ilike(f'%{query}%'),
+                    Entry.pages.any(page_filter)
+                )
+            )
+            
+        # Filter by tag if provided
+        if tag:
+            entries_query = entries_query.filter(
+                Entry.tags.any(Tag.name == tag)
+            )
+            
+        # Order by date (newest first)
+        return entries_query.order_by(Entry.date.desc())
\ No newline at end of file
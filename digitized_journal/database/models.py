@@ -1,9 +1,10 @@
 """SQLAlchemy models for the journal application."""
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table, create_engine
+from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, ForeignKey, Table, Index, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy.sql import table, column
 from typing import List, Optional
 
 Base = declarative_base()
@@ -12,8 +13,8 @@ Base = declarative_base()
 entry_tag_association = Table(
     'entry_tag',
     Base.metadata,
-    Column('entry_id', Integer, ForeignKey('entries.id')),
-    Column('tag_id', Integer, ForeignKey('tags.id'))
+    Column('entry_id', Integer, ForeignKey('entries.id', ondelete='CASCADE'), index=True),
+    Column('tag_id', Integer, ForeignKey('tags.id', ondelete='CASCADE'), index=True)
 )
 
 
@@ -23,7 +24,7 @@ class Entry(Base):
 
     id = Column(Integer, primary_key=True)
     title = Column(String(200), nullable=True)
-    date = Column(DateTime, default=datetime.now)
+    date = Column(DateTime, default=datetime.now, index=True)
     mood = Column(String(50), nullable=True)
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
@@ -31,7 +32,8 @@ class Entry(Base):
     # Relationships
     pages = relationship('Page', back_populates='entry', order_by='Page.page_number', 
                          cascade="all, delete-orphan")
-    tags = relationship('Tag', secondary=entry_tag_association, back_populates='entries')
+    tags = relationship('Tag', secondary=entry_tag_association, back_populates='entries',
+                        lazy='selectin')
 
     def __repr__(self):
         return f"<Entry(id={self.id}, title='{self.title}', date='{self.date.strftime('%Y-%m-%d')}')>"
@@ -40,12 +42,20 @@ class Entry(Base):
 class Page(Base):
     """A single page of a journal entry with image and OCR text."""
     __tablename__ = 'pages'
+    __table_args__ = (
+        # Covers lookups by entry_id as well as ordering pages within an entry
+        Index('ix_pages_entry_page', 'entry_id', 'page_number'),
+    )
 
     id = Column(Integer, primary_key=True)
-    entry_id = Column(Integer, ForeignKey('entries.id'), nullable=False)
+    entry_id = Column(Integer, ForeignKey('entries.id', ondelete='CASCADE'), nullable=False)
     page_number = Column(Integer, nullable=False)
     image_path = Column(String(500), nullable=False)
+    image_sha256 = Column(String(64), nullable=True, index=True)  # Hash of the image contents
     text_content = Column(Text, nullable=True)
+    text_content_lc = Column(Text, nullable=True)  # Lower-cased copy for case-insensitive search
+    # Whether the OCR that produced text_content preprocessed the image; None once it is edited
+    ocr_preprocessed = Column(Boolean, nullable=True)
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
@@ -56,6 +66,11 @@ class Page(Base):
         return f"<Page(id={self.id}, entry_id={self.entry_id}, page_number={self.page_number})>"
 
 
+# SQLite FTS5 index over page text. It is created by DatabaseManager rather than
+# metadata.create_all, so it is declared as a lightweight table clause here.
+pages_fts = table('pages_fts', column('rowid'), column('text_content'))
+
+
 class Tag(Base):
     """Tags for journal entries."""
     __tablename__ = 'tags'
@@ -67,4 +82,9 @@ class Tag(Base):
     entries = relationship('Entry', secondary=entry_tag_association, back_populates='tags')
 
     def __repr__(self):
-        return f"<Tag(id={self.id}, name='{self.name}')>"
\ No newline at end of file
+        return f"<Tag(id={self.id}, name='{self.name}')>"
+
+
+# Per-tag entry counts kept up to date by SQLite triggers on entry_tag. Like
+# pages_fts it is created by DatabaseManager, not metadata.create_all.
+tag_usage = table('tag_usage', column('tag_id'), column('count'))
\ No newline at end of file
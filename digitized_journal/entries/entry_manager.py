@@ -1,16 +1,25 @@
 """Business logic for managing journal entries and pages."""
 
+import io
+import os
+import hashlib
 import shutil
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 import logging
-from typing import List, Optional, Dict, Any, Union, Tuple
+from typing import List, Optional, Dict, Any, Union, Tuple, Iterable
+
+from PIL import Image
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.orm import selectinload
 
 from ..database.db_interface import DatabaseManager
 from ..database.models import Entry, Page
 from ..ocr.ocr_engine import OCREngine
-from ..config import IMAGES_DIR
+from ..utils.file_utils import copy_and_hash, copy_file_to_dir, ensure_dir, hash_file, remove_thumbnails
+from ..config import IMAGES_DIR, OCR_MAX_WORKERS, USE_HARDLINKS
 
 logger = logging.getLogger(__name__)
 
@@ -72,45 +81,33 @@ class EntryManager:
         Returns:
             ID of the created page
         """
-        # Get entry
-        entry = self.db_manager.get_entry(entry_id)
-        if not entry:
+        # Check the entry exists and determine page number if not specified
+        next_page_number = self.db_manager.next_page_number(entry_id)
+        if next_page_number is None:
             raise ValueError(f"Entry with ID {entry_id} not found")
             
-        # Determine page number if not specified
         if page_number is None:
-            existing_pages = len(entry.pages)
-            page_number = existing_pages + 1
+            page_number = next_page_number
             
-        # Create directory for entry if it doesn't exist
-        entry_dir = IMAGES_DIR / str(entry_id)
-        entry_dir.mkdir(exist_ok=True)
-        
-        # Copy image to storage
-        image_filename = f"{uuid.uuid4()}{Path(image_path).suffix}"
-        target_path = entry_dir / image_filename
-        shutil.copy2(image_path, target_path)
+        # Read the image once; the same bytes are hashed, stored and decoded for OCR
+        image_data = Path(image_path).read_bytes()
+        target_path, image_sha256 = self._store_image_data(
+            entry_id, image_data, Path(image_path).suffix
+        )
         
-        # Extract text via OCR
-        try:
-            ocr_result = self.ocr_engine.process_image_with_confidence(
-                target_path, preprocess=preprocess
-            )
-            text_content = ocr_result['text']
-            
-            logger.info(f"OCR completed with confidence: {ocr_result['confidence']:.2f}%, "
-                       f"word count: {ocr_result['word_count']}")
-                       
-        except Exception as e:
-            logger.error(f"OCR failed for {image_path}: {str(e)}")
-            text_content = ""  # Empty text if OCR fails
+        # Reuse the text of an identical image instead of running OCR again
+        text_content = self.db_manager.get_text_by_image_hash(image_sha256, preprocess)
+        if text_content is None:
+            text_content = self._run_ocr(target_path, preprocess, image_data=image_data)
             
         # Save page to database
         return self.db_manager.add_page(
             entry_id=entry_id,
             page_number=page_number,
             image_path=str(target_path),
-            text_content=text_content
+            text_content=text_content,
+            image_sha256=image_sha256,
+            ocr_preprocessed=preprocess
         )
         
     def add_multiple_pages(self, 
@@ -120,6 +117,10 @@ class EntryManager:
         """
         Add multiple pages to an entry from images.
         
+        OCR runs in parallel worker processes and is skipped for images
+        whose text is already known. All pages are written to the database
+        in a single transaction once every image has been processed.
+        
         Args:
             entry_id: ID of the entry
             image_paths: List of paths to image files
@@ -128,25 +129,189 @@ class EntryManager:
         Returns:
             List of page IDs
         """
-        # Get entry
-        entry = self.db_manager.get_entry(entry_id)
-        if not entry:
+        # Check the entry exists and find where its new pages start
+        start_page_number = self.db_manager.next_page_number(entry_id)
+        if start_page_number is None:
             raise ValueError(f"Entry with ID {entry_id} not found")
             
-        # Process each image
-        page_ids = []
-        start_page_number = len(entry.pages) + 1
+        stored_images: List[Tuple[Path, str]] = []
+        texts_by_hash: Dict[str, Optional[str]] = {}
+        ocr_hashes: List[str] = []
         
-        for i, image_path in enumerate(image_paths):
-            page_id = self.add_page_from_image(
-                entry_id=entry_id,
-                image_path=image_path,
-                page_number=start_page_number + i,
-                preprocess=preprocess
+        def images_needing_ocr():
+            """Yield stored images whose text isn't known yet, as each copy finishes."""
+            for copy in copies:
+                target_path, image_sha256 = copy.result()
+                stored_images.append((target_path, image_sha256))
+                
+                if image_sha256 not in texts_by_hash:
+                    texts_by_hash[image_sha256] = self.db_manager.get_text_by_image_hash(image_sha256, preprocess)
+                    if texts_by_hash[image_sha256] is None:
+                        ocr_hashes.append(image_sha256)
+                        yield target_path
+                        
+        # Copy images to storage in the background so OCR can start on the
+        # first image while the rest are still being copied
+        copies = []
+        try:
+            with ThreadPoolExecutor(max_workers=1) as copier:
+                copies = [copier.submit(self._store_image, entry_id, image_path) 
+                          for image_path in image_paths]
+                texts = self._run_ocr_parallel(
+                    images_needing_ocr(), 
+                    max_workers=min(len(copies), OCR_MAX_WORKERS), 
+                    preprocess=preprocess
+                )
+                texts_by_hash.update(zip(ocr_hashes, texts))
+                
+            rows = [
+                {
+                    'entry_id': entry_id,
+                    'page_number': start_page_number + i,
+                    'image_path': str(target_path),
+                    'text_content': texts_by_hash[image_sha256],
+                    'image_sha256': image_sha256,
+                    'ocr_preprocessed': preprocess
+                }
+                for i, (target_path, image_sha256) in enumerate(stored_images)
+            ]
+            return self.db_manager.add_pages_bulk(rows)
+        except Exception:
+            # Don't leave behind copies that no page ended up using; every copy
+            # has finished once the executor has shut down
+            self._remove_unused_images(
+                copy.result()[0] for copy in copies if copy.exception() is None
             )
-            page_ids.append(page_id)
+            raise
+            
+    def _remove_unused_images(self, image_paths: Iterable[Path]) -> None:
+        """Delete stored images, and their thumbnails, that no page references."""
+        image_paths = {str(image_path) for image_path in image_paths}
+        for image_path in image_paths - self.db_manager.get_referenced_image_paths(image_paths):
+            try:
+                os.remove(image_path)
+            except OSError as e:
+                logger.error(f"Error deleting image file: {str(e)}")
+            remove_thumbnails(image_path)
+            
+    def _store_image(self, entry_id: int, image_path: Union[str, Path]) -> Tuple[Path, str]:
+        """
+        Copy an image into the entry's storage directory under its content hash.
+        
+        Storing the same image twice in one entry keeps a single file. With
+        USE_HARDLINKS set the stored file is a hard link to the source where
+        possible, so only the hash reads the image data.
+        
+        Args:
+            entry_id: ID of the entry
+            image_path: Path to the source image file
             
-        return page_ids
+        Returns:
+            Tuple of (path to the stored copy, SHA-256 hex digest of the image)
+        """
+        # Store under a temporary name, then move to the hashed name
+        temp_path = self._entry_dir(entry_id) / f".{uuid.uuid4()}.tmp"
+        if USE_HARDLINKS:
+            copy_file_to_dir(image_path, temp_path.parent, temp_path.name)
+            image_sha256 = hash_file(temp_path)
+        else:
+            # Hash each block as it is copied so the source is read once
+            image_sha256 = copy_and_hash(image_path, temp_path)
+        
+        return self._finalize_stored_image(temp_path, image_sha256, Path(image_path).suffix)
+        
+    def _store_image_data(self, entry_id: int, image_data: bytes, suffix: str) -> Tuple[Path, str]:
+        """
+        Write image bytes into the entry's storage directory under their content hash.
+        
+        Args:
+            entry_id: ID of the entry
+            image_data: Encoded image file contents
+            suffix: File extension to store the image with
+            
+        Returns:
+            Tuple of (path to the stored copy, SHA-256 hex digest of the image)
+        """
+        temp_path = self._entry_dir(entry_id) / f".{uuid.uuid4()}.tmp"
+        temp_path.write_bytes(image_data)
+        image_sha256 = hashlib.sha256(image_data).hexdigest()
+        
+        return self._finalize_stored_image(temp_path, image_sha256, suffix)
+        
+    def _entry_dir(self, entry_id: int) -> Path:
+        """Get the image storage directory for an entry, creating it if needed."""
+        return ensure_dir(str(IMAGES_DIR / str(entry_id)))
+        
+    def _finalize_stored_image(self, temp_path: Path, image_sha256: str, suffix: str) -> Tuple[Path, str]:
+        """Move a freshly written image to its content-addressed name, keeping one copy."""
+        target_path = temp_path.parent / f"{image_sha256}{suffix}"
+        
+        if target_path.exists():
+            temp_path.unlink()
+        else:
+            os.replace(temp_path, target_path)
+            
+        return target_path, image_sha256
+        
+    def _run_ocr(self, 
+                 image_path: Path, 
+                 preprocess: bool = True, 
+                 image_data: Optional[bytes] = None) -> str:
+        """
+        Extract text from a stored image, returning an empty string if OCR fails.
+        
+        Args:
+            image_path: Path to the stored image
+            preprocess: Whether to preprocess the image before OCR
+            image_data: Already read contents of the image, decoded instead of re-reading the file
+            
+        Returns:
+            Extracted text
+        """
+        try:
+            # Decode inside the try so an unreadable image is stored with empty text
+            image = Image.open(io.BytesIO(image_data)) if image_data is not None else image_path
+            ocr_result = self.ocr_engine.process_image_with_confidence(image, preprocess=preprocess)
+            self._log_ocr_result(ocr_result)
+            return ocr_result['text']
+        except Exception as e:
+            logger.error(f"OCR failed for {image_path}: {str(e)}")
+            return ""  # Empty text if OCR fails
+            
+    def _run_ocr_parallel(self, 
+                          image_paths: Iterable[Path], 
+                          max_workers: int, 
+                          preprocess: bool = True) -> List[str]:
+        """
+        Extract text from several stored images using the OCR engine's process pool.
+        
+        Args:
+            image_paths: Paths to the stored images
+            max_workers: Maximum number of worker processes
+            preprocess: Whether to preprocess images before OCR
+            
+        Returns:
+            Extracted text for each image, in order
+        """
+        ocr_results = self.ocr_engine.process_images_with_confidence(
+            image_paths, preprocess=preprocess, max_workers=max_workers
+        )
+        
+        texts = []
+        for ocr_result in ocr_results:
+            if ocr_result is None:
+                texts.append("")  # Empty text if OCR fails
+                continue
+            self._log_ocr_result(ocr_result)
+            texts.append(ocr_result['text'])
+            
+        return texts
+        
+    @staticmethod
+    def _log_ocr_result(ocr_result: Dict[str, Any]) -> None:
+        """Log the quality metrics of an OCR result."""
+        logger.info(f"OCR completed with confidence: {ocr_result['confidence']:.2f}%, "
+                   f"word count: {ocr_result['word_count']}")
         
     def update_page_text(self, page_id: int, text_content: str) -> bool:
         """
@@ -191,14 +356,38 @@ class EntryManager:
     def get_entry_with_pages(self, entry_id: int) -> Optional[Entry]:
         """Get an entry with all its pages."""
         session = self.db_manager.get_session()
-        try:
-            entry = session.query(Entry).filter_by(id=entry_id).first()
-            if entry:
-                # Force loading pages while session is still open
-                _ = list(entry.pages)
-            return entry
-        finally:
-            session.close()
+        # The lambda statement is compiled once and reused with new entry IDs
+        stmt = lambda_stmt(lambda: select(Entry).options(
+            selectinload(Entry.tags), selectinload(Entry.pages)
+        ).where(Entry.id == entry_id))
+        return session.execute(stmt).scalars().first()
+        
+    def get_entry_header(self, entry_id: int) -> Optional[Tuple[Optional[str], datetime]]:
+        """
+        Get the title and date of an entry without loading it.
+        
+        Args:
+            entry_id: ID of the entry
+            
+        Returns:
+            Tuple of (title, date), or None if the entry doesn't exist
+        """
+        return self.db_manager.get_entry_header(entry_id)
+        
+    def get_entry_for_view(self, entry_id: int, preview_chars: int = 500) -> Optional[Tuple[Entry, Iterable[Any]]]:
+        """
+        Get an entry with a bounded text preview of each page, for display.
+        
+        Args:
+            entry_id: ID of the entry
+            preview_chars: Number of characters to show per page
+            
+        Returns:
+            Tuple of (entry, iterable of page rows fetched as they are read),
+            or None if the entry doesn't exist; a preview longer than
+            preview_chars means the text was cut off
+        """
+        return self.db_manager.get_entry_for_view(entry_id, preview_chars)
         
     def get_all_entries(self) -> List[Entry]:
         """
@@ -209,6 +398,36 @@ class EntryManager:
         """
         return self.db_manager.get_all_entries()
         
+    def get_entry_summaries(self, offset: int = 0, limit: Optional[int] = None) -> List[Any]:
+        """
+        Get the display fields of entries for cards, computed in SQL.
+        
+        Args:
+            offset: Number of entries to skip
+            limit: Maximum number of entries to return (optional)
+            
+        Returns:
+            Rows with id, title, date, mood, tag_list, page_count and
+            cover_path, ordered by date (newest first)
+        """
+        return self.db_manager.get_entry_summaries(offset, limit)
+        
+    def count_entries(self) -> int:
+        """Get the total number of journal entries."""
+        return self.db_manager.count_entries()
+        
+    def list_entries_summary(self, limit: Optional[int] = None) -> List[Tuple[Entry, int]]:
+        """
+        Get entries with their page counts for listings.
+        
+        Args:
+            limit: Maximum number of entries to return (optional)
+            
+        Returns:
+            List of (Entry, page count) tuples ordered by date (newest first)
+        """
+        return self.db_manager.list_entries_summary(limit)
+        
     def search_entries(self, query: Optional[str] = None, tag: Optional[str] = None) -> List[Entry]:
         """
         Search for entries.
@@ -222,6 +441,22 @@ class EntryManager:
         """
         return self.db_manager.search_entries(query, tag)
         
+    def search_entries_with_snippets(self, 
+                                     query: Optional[str], 
+                                     tag: Optional[str] = None) -> List[Tuple[Entry, Optional[int], Optional[str]]]:
+        """
+        Search for entries, with a text snippet from the first matching page.
+        
+        Args:
+            query: Text to search for (optional)
+            tag: Tag to filter by (optional)
+            
+        Returns:
+            List of (entry, page number, snippet) tuples; page number and snippet
+            are None when only the title matched or no query was given
+        """
+        return self.db_manager.search_entries_with_snippets(query, tag)
+        
     def delete_entry(self, entry_id: int) -> bool:
         """
         Delete an entry and its pages.
@@ -232,22 +467,55 @@ class EntryManager:
         Returns:
             Success status
         """
-        # Get entry to find its images
-        entry = self.db_manager.get_entry(entry_id)
-        if not entry:
-            return False
-            
-        # Delete entry from database (cascades to pages)
+        # Delete entry from database along with its pages
         result = self.db_manager.delete_entry(entry_id)
         
         if result:
             # Delete entry directory with images
             entry_dir = IMAGES_DIR / str(entry_id)
             if entry_dir.exists():
+                for image_path in entry_dir.iterdir():
+                    remove_thumbnails(image_path)
                 shutil.rmtree(entry_dir)
+                # SQLite may hand the same ID to a later entry
+                ensure_dir.cache_clear()
                 
         return result
         
+    def delete_page(self, page_id: int) -> bool:
+        """
+        Delete a page, and its image file unless another page stores the same image.
+        
+        Args:
+            page_id: ID of the page
+            
+        Returns:
+            Success status
+        """
+        deleted, unused_image_path = self.db_manager.delete_page(page_id)
+        
+        if unused_image_path and os.path.exists(unused_image_path):
+            try:
+                os.remove(unused_image_path)
+            except OSError as e:
+                logger.error(f"Error deleting image file: {str(e)}")
+            remove_thumbnails(unused_image_path)
+                
+        return deleted
+        
+    def compute_stats(self, top_tags: int = 10) -> Dict[str, Any]:
+        """
+        Get journal statistics.
+        
+        Args:
+            top_tags: Number of most used tags to include
+            
+        Returns:
+            Dictionary of counts, the date range, the most used tags and
+            entries per month, as plain Python values
+        """
+        return self.db_manager.compute_stats(top_tags)
+        
     def reprocess_page_ocr(self, page_id: int, preprocess: bool = True) -> Optional[str]:
         """
         Re-run OCR on an existing page.
@@ -272,7 +540,7 @@ class EntryManager:
             )
             
             # Update the page text
-            self.db_manager.update_page_text(page_id, text_content)
+            self.db_manager.update_page_text(page_id, text_content, ocr_preprocessed=preprocess)
             
             return text_content
             
@@ -1,23 +1,57 @@
-"""Export journal entries to various formats."""
+"""Export journal entries to various formats.
 
+ReportLab and Pillow are only imported once a PDF export is requested, so
+code that just needs Markdown exports does not pay for loading them.
+"""
+
+import io
 import os
 from pathlib import Path
 import logging
 from datetime import datetime
-from typing import Optional, List, Union, Dict, Any
-import markdown
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage, PageBreak
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from PIL import Image
+from xml.sax.saxutils import escape
+from typing import Optional, List, Union, Dict, Any, Tuple, Iterable, Iterator, NamedTuple, TYPE_CHECKING
 
 from ..database.models import Entry, Page
-from ..config import EXPORTS_DIR
+from ..config import EXPORTS_DIR, PDF_IMAGE_DPI
+
+if TYPE_CHECKING:
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.utils import ImageReader
 
 logger = logging.getLogger(__name__)
 
+# Write buffer for export files, so large entries go out in few write calls
+EXPORT_BUFFER_SIZE = 1 << 20
+
+
+class PageView(NamedTuple):
+    """Plain copy of the page fields an export reads."""
+    
+    page_number: int
+    image_path: str
+    text_content: Optional[str]
+
+class _FlowableStream(list):
+    """
+    Flowable list for doc.build that is refilled from an iterable of groups.
+    
+    ReportLab consumes the list from the front until it is empty, so the next
+    group is only created once the previous one has been laid out.
+    """
+    
+    def __init__(self, first: Iterable[Any], groups: Iterable[List[Any]]):
+        super().__init__(first)
+        self._groups = iter(groups)
+        
+    def __len__(self) -> int:
+        while not super().__len__():
+            group = next(self._groups, None)
+            if group is None:
+                return 0
+            self.extend(group)
+        return super().__len__()
+
 class EntryExporter:
     """Exports journal entries to various formats."""
     
@@ -43,43 +77,65 @@ class EntryExporter:
             Path to the created Markdown file
         """
         if output_path is None:
-            date_str = entry.date.strftime('%Y-%m-%d')
-            title_slug = entry.title.lower().replace(' ', '-') if entry.title else 'untitled'
-            filename = f"{date_str}_{title_slug}.md"
-            output_path = self.output_dir / filename
+            output_path = self.output_dir / self._export_filename(entry, 'md')
             
-        with open(output_path, 'w', encoding='utf-8') as f:
-            # Write header
-            f.write(f"# {entry.title or 'Untitled Entry'}\n\n")
+        with open(output_path, 'w', encoding='utf-8', buffering=EXPORT_BUFFER_SIZE) as f:
+            f.writelines(self._markdown_parts(entry))
             
-            # Write metadata
-            f.write(f"Date: {entry.date.strftime('%Y-%m-%d %H:%M')}\n")
+        logger.info(f"Markdown export completed: {output_path}")
+        return output_path
+        
+    def to_markdown_bytes(self, entry: Entry) -> Tuple[str, bytes]:
+        """
+        Export an entry to Markdown in memory, without writing a file.
+        
+        Args:
+            entry: Entry object to export
             
-            if entry.mood:
-                f.write(f"Mood: {entry.mood}\n")
-                
-            if entry.tags:
-                tag_list = ', '.join([tag.name for tag in entry.tags])
-                f.write(f"Tags: {tag_list}\n")
-                
-            f.write("\n---\n\n")
+        Returns:
+            Tuple of (suggested file name, UTF-8 encoded Markdown)
+        """
+        content = ''.join(self._markdown_parts(entry)).encode('utf-8')
+        return self._export_filename(entry, 'md'), content
+        
+    @staticmethod
+    def _export_filename(entry: Entry, extension: str) -> str:
+        """Build the default export file name from the entry's date and title."""
+        date_str = entry.date.strftime('%Y-%m-%d')
+        title_slug = entry.title.lower().replace(' ', '-') if entry.title else 'untitled'
+        return f"{date_str}_{title_slug}.{extension}"
+        
+    def _markdown_parts(self, entry: Entry) -> List[str]:
+        """Build the Markdown document for an entry as a list of string pieces."""
+        # Header
+        parts = [f"# {entry.title or 'Untitled Entry'}\n\n"]
+        
+        # Metadata
+        parts.append(f"Date: {entry.date.strftime('%Y-%m-%d %H:%M')}\n")
+        
+        if entry.mood:
+            parts.append(f"Mood: {entry.mood}\n")
             
-            # Write pages
-            for page in entry.pages:
-                f.write(f"## Page {page.page_number}\n\n")
-                
-                # Add image reference
-                image_path = Path(page.image_path)
-                f.write(f"![Page {page.page_number} Image]({image_path})\n\n")
-                
-                # Add text content
-                if page.text_content:
-                    f.write(page.text_content)
-                    
-                f.write("\n\n---\n\n")
+        if entry.tags:
+            tag_list = ', '.join(tag.name for tag in entry.tags)
+            parts.append(f"Tags: {tag_list}\n")
+            
+        parts.append("\n---\n\n")
+        
+        # Pages
+        for page in self._page_views(entry):
+            parts.append(f"## Page {page.page_number}\n\n")
+            
+            # Image reference
+            parts.append(f"![Page {page.page_number} Image]({Path(page.image_path)})\n\n")
+            
+            # Text content
+            if page.text_content:
+                parts.append(page.text_content)
                 
-        logger.info(f"Markdown export completed: {output_path}")
-        return output_path
+            parts.append("\n\n---\n\n")
+            
+        return parts
         
     def to_pdf(self, entry: Entry, output_path: Optional[Path] = None, 
               include_images: bool = True, max_image_width: int = 5) -> Path:
@@ -96,11 +152,38 @@ class EntryExporter:
             Path to the created PDF file
         """
         if output_path is None:
-            date_str = entry.date.strftime('%Y-%m-%d')
-            title_slug = entry.title.lower().replace(' ', '-') if entry.title else 'untitled'
-            filename = f"{date_str}_{title_slug}.pdf"
-            output_path = self.output_dir / filename
+            output_path = self.output_dir / self._export_filename(entry, 'pdf')
             
+        self._build_pdf(entry, str(output_path), include_images, max_image_width)
+        
+        logger.info(f"PDF export completed: {output_path}")
+        return output_path
+        
+    def to_pdf_bytes(self, entry: Entry, include_images: bool = True, 
+                     max_image_width: int = 5) -> Tuple[str, bytes]:
+        """
+        Export an entry to PDF in memory, without writing a file.
+        
+        Args:
+            entry: Entry object to export
+            include_images: Whether to include page images
+            max_image_width: Maximum width of images in inches
+            
+        Returns:
+            Tuple of (suggested file name, PDF data)
+        """
+        buffer = io.BytesIO()
+        self._build_pdf(entry, buffer, include_images, max_image_width)
+        return self._export_filename(entry, 'pdf'), buffer.getvalue()
+        
+    def _build_pdf(self, entry: Entry, target: Union[str, io.BytesIO], 
+                   include_images: bool, max_image_width: int) -> None:
+        """Lay out an entry as a PDF written to a file path or binary buffer."""
+        from reportlab.lib.enums import TA_CENTER, TA_LEFT
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+        
         # Set up PDF styles
         styles = getSampleStyleSheet()
         title_style = ParagraphStyle(
@@ -120,7 +203,7 @@ class EntryExporter:
         )
         
         # Create document
-        doc = SimpleDocTemplate(str(output_path), pagesize=letter,
+        doc = SimpleDocTemplate(target, pagesize=letter,
                              rightMargin=72, leftMargin=72,
                              topMargin=72, bottomMargin=72)
                              
@@ -147,8 +230,43 @@ class EntryExporter:
             
         elements.append(Spacer(1, 24))
         
-        # Pages content
-        for page in entry.pages:
+        # Build PDF, creating each page's content only when the layout reaches it
+        doc.build(_FlowableStream(elements, self._pdf_page_elements(
+            self._page_views(entry), include_images, max_image_width, heading_style, normal_style
+        )))
+        
+    def _pdf_page_elements(self, 
+                           pages: List[PageView], 
+                           include_images: bool, 
+                           max_image_width: int, 
+                           heading_style: 'ParagraphStyle', 
+                           normal_style: 'ParagraphStyle') -> Iterator[List[Any]]:
+        """
+        Generate the PDF content of an entry one page at a time.
+        
+        Args:
+            pages: Pages of the entry being exported
+            include_images: Whether to include page images
+            max_image_width: Maximum width of images in inches
+            heading_style: Style for page headings
+            normal_style: Style for page text
+            
+        Yields:
+            List of flowables for each page
+        """
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Paragraph, Spacer, PageBreak
+        from .pdf_flowables import CachedImage
+        
+        last_index = len(pages) - 1
+        
+        # Readers for images repeated within this export only, so nothing
+        # outlives the build: (image path, draw width) -> (reader, height / width ratio)
+        image_cache: Dict[Tuple[str, float], Tuple['ImageReader', float]] = {}
+        
+        for index, page in enumerate(pages):
+            elements = []
+            
             # Page heading
             elements.append(Paragraph(f"Page {page.page_number}", heading_style))
             elements.append(Spacer(1, 12))
@@ -156,39 +274,124 @@ class EntryExporter:
             # Image
             if include_images and os.path.exists(page.image_path):
                 try:
-                    # Calculate image dimensions
-                    img = Image.open(page.image_path)
-                    width, height = img.size
-                    aspect = height / width
-                    
                     img_width = min(max_image_width * inch, 6 * inch)  # Limit width
+                    reader, aspect = self._get_pdf_image(page.image_path, img_width, image_cache)
                     img_height = img_width * aspect
                     
                     # Add image
-                    elements.append(RLImage(page.image_path, width=img_width, height=img_height))
+                    elements.append(CachedImage(reader, width=img_width, height=img_height))
                     elements.append(Spacer(1, 12))
                 except Exception as e:
                     logger.error(f"Error adding image to PDF: {str(e)}")
                     
-            # Text content
+            # Text content, as a single paragraph with blank lines between blocks.
+            # The text is escaped for ReportLab's paragraph markup.
             if page.text_content:
-                paragraphs = page.text_content.split('\n\n')
-                for para in paragraphs:
-                    if para.strip():
-                        elements.append(Paragraph(para.replace('\n', '<br/>'), normal_style))
-                        elements.append(Spacer(1, 6))
+                paragraphs = [para for para in page.text_content.split('\n\n') if para.strip()]
+                if paragraphs:
+                    markup = '<br/><br/>'.join(escape(para).replace('\n', '<br/>') for para in paragraphs)
+                    elements.append(Paragraph(markup, normal_style))
+                    elements.append(Spacer(1, 6))
                         
             # Page separator
             elements.append(Spacer(1, 20))
-            if page != entry.pages[-1]:  # If not the last page
+            if index != last_index:  # If not the last page
                 elements.append(PageBreak())
                 
-        # Build PDF
-        doc.build(elements)
+            yield elements
         
-        logger.info(f"PDF export completed: {output_path}")
-        return output_path
+    @staticmethod
+    def _page_views(entry: Entry) -> List[PageView]:
+        """
+        Copy the fields an export needs from each page of an entry.
         
+        The pages relationship and its columns are read once here, so the
+        export loops only touch plain tuples.
+        
+        Args:
+            entry: Entry object to export
+            
+        Returns:
+            Page views in the entry's page order
+        """
+        return [PageView(page.page_number, page.image_path, page.text_content) 
+                for page in entry.pages]
+        
+    def _get_pdf_image(self, 
+                       image_path: str, 
+                       draw_width: float, 
+                       image_cache: Dict[Tuple[str, float], Tuple['ImageReader', float]]
+                       ) -> Tuple['ImageReader', float]:
+        """
+        Get a reader for a page image, reusing it for repeated images.
+        
+        Args:
+            image_path: Path to the page image
+            draw_width: Width the image is drawn at, in points
+            image_cache: Readers already prepared during the current export
+            
+        Returns:
+            Tuple of (image reader, height / width ratio)
+        """
+        from reportlab.lib.utils import ImageReader
+        
+        key = (str(image_path), draw_width)
+        cached = image_cache.get(key)
+        if cached is None:
+            image_source, aspect = self._prepare_pdf_image(image_path, draw_width)
+            cached = image_cache[key] = (ImageReader(image_source), aspect)
+        return cached
+        
+    def _prepare_pdf_image(self, 
+                           image_path: str, 
+                           draw_width: float) -> Tuple[Union[str, io.BytesIO], float]:
+        """
+        Get the image to embed in a PDF and its aspect ratio.
+        
+        Images with more pixels than PDF_IMAGE_DPI needs at the drawn width,
+        or with an EXIF orientation other than upright, are rotated upright,
+        downscaled as needed and re-encoded as JPEG in memory; other images
+        are embedded from their file as-is.
+        
+        Args:
+            image_path: Path to the page image
+            draw_width: Width the image is drawn at, in points
+            
+        Returns:
+            Tuple of (path or in-memory file to embed, height / width ratio)
+        """
+        from PIL import Image, ImageOps
+        from reportlab.lib.units import inch
+        
+        target_px = int(draw_width / inch * PDF_IMAGE_DPI)
+        
+        with Image.open(image_path) as img:
+            # Only the header has been read so far
+            width, height = img.size
+            orientation = img.getexif().get(0x0112, 1)
+            
+            # Orientations 5-8 swap width and height once the image is upright
+            rotated = orientation in (5, 6, 7, 8)
+            upright_width, upright_height = (height, width) if rotated else (width, height)
+            
+            if upright_width <= target_px and orientation == 1:
+                return image_path, height / width
+                
+            if upright_width > target_px:
+                # Let the JPEG decoder scale down while decoding, then finish the resize
+                draft_height = int(target_px * upright_height / upright_width)
+                img.draft('RGB', (draft_height, target_px) if rotated else (target_px, draft_height))
+                
+            img = ImageOps.exif_transpose(img).convert('RGB')
+            if img.width > target_px:
+                img.thumbnail((target_px, img.height), Image.LANCZOS)
+            
+            buffer = io.BytesIO()
+            img.save(buffer, format='JPEG', quality=85, optimize=True)
+            buffer.seek(0)
+            
+            return buffer, img.height / img.width
+            
     def _format_metadata(self, entry: Entry) -> str:
         """Format entry metadata as text."""
         meta = []
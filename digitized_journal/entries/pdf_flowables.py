@@ -0,0 +1,14 @@
+"""ReportLab flowables used by PDF exports."""
+
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Image as RLImage
+
+
+class CachedImage(RLImage):
+    """Image flowable drawn from an already loaded ImageReader."""
+    
+    def __init__(self, reader: ImageReader, width: float, height: float):
+        # Set before the base class sets up, so it sizes and draws from this
+        # reader instead of opening the file again
+        self._img = reader
+        super().__init__(reader.fp, width=width, height=height)
\ No newline at end of file
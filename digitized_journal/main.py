@@ -3,7 +3,10 @@
 import os
 import sys
 import argparse
+import atexit
 import logging
+import logging.handlers
+import queue
 from pathlib import Path
 
 from digitized_journal.database.db_interface import DatabaseManager
@@ -18,12 +21,19 @@ def setup_logging():
     # Configure logging
     log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     
-    # Set up file handler
+    # Set up file handler. Records are formatted by the queue handler and
+    # written to the file by a background thread, so logging calls in OCR
+    # loops do not wait on file writes.
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(log_queue, logging.FileHandler(LOG_FILE))
+    listener.start()
+    atexit.register(listener.stop)  # Writes out queued records on exit
+    
     logging.basicConfig(
         level=getattr(logging, LOG_LEVEL),
         format=log_format,
         handlers=[
-            logging.FileHandler(LOG_FILE),
+            logging.handlers.QueueHandler(log_queue),
             logging.StreamHandler(sys.stdout)
         ]
     )
@@ -1,20 +1,88 @@
 """OCR engine for extracting text from images."""
 
+import atexit
+import multiprocessing
 import pytesseract
 import re
 import logging
+import cv2
+import threading
+import numpy as np
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from PIL import Image
-from typing import Union, Dict, Any, Optional
+from typing import Union, Dict, Any, Optional, List, Iterable, Tuple
 
-from ..config import OCR_LANGUAGE, OCR_CONFIG
+from ..config import OCR_LANGUAGE, OCR_CONFIG, OCR_MAX_WORKERS, TESSERACT_CMD
 from .preprocessor import ImagePreprocessor
 
 logger = logging.getLogger(__name__)
 
+# A path to an image file, or an image that has already been decoded
+ImageSource = Union[str, Path, np.ndarray, Image.Image]
+
+# Patterns used by cleanup_text, compiled once at import
+_WHITESPACE_RE = re.compile(r'\s+')
+_EXTRA_NEWLINES_RE = re.compile(r'\n{3,}')
+_SPACE_BEFORE_PUNCT_RE = re.compile(r'\s+([.,;:!?])')
+_SPACED_APOSTROPHE_RE = re.compile(r"(\w)\s+(')(\w)")
+
+# Common OCR error corrections, only applied between letters
+_OCR_REPLACEMENTS = {
+    '|': 'I',             # Vertical bar to letter I
+    '{': '(',             # Common bracket confusions
+    '}': ')',
+    '0': 'O',             # Common number/letter confusions in context
+    '1': 'I',
+    '5': 'S',
+}
+# The pattern starts with the error character class so the regex engine can
+# skip straight to candidate characters; the letter before it is checked by
+# looking back over the matched character
+_OCR_ERROR_RE = re.compile(
+    '([' + ''.join(re.escape(err) for err in _OCR_REPLACEMENTS) + '])(?<=[a-zA-Z].)(?=[a-zA-Z])'
+)
+
+# OCR engine owned by each worker process of the batch OCR pool
+_worker_engine: Optional['OCREngine'] = None
+
+def _init_worker(lang: str, config: str) -> None:
+    """Create the OCR engine once per worker process."""
+    global _worker_engine
+    _worker_engine = OCREngine(lang=lang, config=config)
+
+def _process_in_worker(method: str, image_path: str, preprocess: bool) -> Any:
+    """Run one of the engine's single-image methods inside a worker process."""
+    try:
+        return getattr(_worker_engine, method)(image_path, preprocess=preprocess)
+    except Exception as e:
+        # Some pytesseract errors cannot be unpickled in the parent, which
+        # would break the whole pool; pass the message on instead
+        raise RuntimeError(str(e)) from None
+
+# Worker processes are spawned rather than forked: the web server runs
+# several threads, and a fork can copy a lock another thread is holding
+_MP_CONTEXT = multiprocessing.get_context('spawn')
+
+# Long-lived pools for background OCR, one per language and config
+_background_pools: Dict[Tuple[str, str], ProcessPoolExecutor] = {}
+_background_pools_lock = threading.Lock()
+
+@atexit.register
+def _shutdown_background_pools() -> None:
+    """Stop the background OCR workers when the process exits."""
+    with _background_pools_lock:
+        for executor in _background_pools.values():
+            executor.shutdown(wait=False)
+        _background_pools.clear()
+
 class OCREngine:
     """Handles OCR processing using Tesseract."""
     
+    # The Tesseract binary is a pytesseract module global, set once per process
+    _configured = False
+    
     def __init__(self, lang: str = OCR_LANGUAGE, config: str = OCR_CONFIG):
         """
         Initialize the OCR engine.
@@ -27,15 +95,20 @@ class OCREngine:
         self.config = config
         self.preprocessor = ImagePreprocessor()
         
+        if not OCREngine._configured:
+            if TESSERACT_CMD:
+                pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+            OCREngine._configured = True
+        
     def process_image(self, 
-                      image_path: Union[str, Path], 
+                      image_path: ImageSource, 
                       preprocess: bool = True, 
                       cleanup_text: bool = True) -> str:
         """
         Extract text from an image.
         
         Args:
-            image_path: Path to the image file
+            image_path: Path to the image file, or an already decoded image
             preprocess: Whether to preprocess the image
             cleanup_text: Whether to clean up the extracted text
             
@@ -45,16 +118,9 @@ class OCREngine:
         logger.info(f"Processing image for OCR: {image_path}")
         
         try:
-            image_path = Path(image_path)
-            
-            # Preprocess image
-            if preprocess:
-                image = self.preprocessor.preprocess(image_path)
-            else:
-                image = Image.open(image_path)
+            image = self._load_image(image_path, preprocess)
                 
             # Extract text
-            pytesseract.pytesseract.tesseract_cmd = r'C:\Users\nxg11379\AppData\Local\Programs\Tesseract-OCR\tesseract.exe'
             text = pytesseract.image_to_string(image, lang=self.lang, config=self.config)
             
             # Clean up text
@@ -68,42 +134,32 @@ class OCREngine:
             raise
     
     def process_image_with_confidence(self, 
-                                     image_path: Union[str, Path], 
+                                     image_path: ImageSource, 
                                      preprocess: bool = True) -> Dict[str, Any]:
         """
         Extract text with confidence scores from an image.
         
         Args:
-            image_path: Path to the image file
+            image_path: Path to the image file, or an already decoded image
             preprocess: Whether to preprocess the image
             
         Returns:
             Dictionary with text and confidence metrics
         """
         try:
-            image_path = Path(image_path)
-            
-            # Preprocess image
-            if preprocess:
-                image = self.preprocessor.preprocess(image_path)
-            else:
-                image = Image.open(image_path)
+            image = self._load_image(image_path, preprocess)
                 
             # Get confidence data
             data = pytesseract.image_to_data(image, lang=self.lang, config=self.config, 
                                            output_type=pytesseract.Output.DICT)
             
             # Extract text and calculate average confidence
-            text_parts = []
-            confidence_values = []
-            
-            for i in range(len(data['text'])):
-                if int(data['conf'][i]) > 0:  # Skip entries with -1 confidence
-                    text_parts.append(data['text'][i])
-                    confidence_values.append(int(data['conf'][i]))
+            confidence_values = np.asarray(data['conf'], dtype=float).astype(np.int32)
+            mask = confidence_values > 0  # Skip entries with -1 confidence
+            text_parts = np.asarray(data['text'], dtype=object)[mask].tolist()
             
             full_text = " ".join(text_parts)
-            avg_confidence = sum(confidence_values) / len(confidence_values) if confidence_values else 0
+            avg_confidence = float(confidence_values[mask].mean()) if mask.any() else 0
             
             if full_text:
                 full_text = self.cleanup_text(full_text)
@@ -118,6 +174,150 @@ class OCREngine:
             logger.error(f"OCR processing with confidence failed: {str(e)}")
             raise
             
+    def submit_image(self, image_path: Union[str, Path], preprocess: bool = True) -> Future:
+        """
+        Start extracting text from an image in a background worker process.
+        
+        The worker pool is created on first use and kept for the life of the
+        process, so later submissions skip the worker startup cost.
+        
+        Args:
+            image_path: Path to the image file
+            preprocess: Whether to preprocess the image
+            
+        Returns:
+            Future resolving to the extracted text, or raising the OCR error
+        """
+        key = (self.lang, self.config)
+        with _background_pools_lock:
+            executor = _background_pools.get(key)
+            if executor is not None:
+                try:
+                    return executor.submit(_process_in_worker, 'process_image', str(image_path), preprocess)
+                except BrokenProcessPool:
+                    logger.warning("Background OCR pool broke, starting a new one")
+                    executor.shutdown(wait=False)
+                    
+            # First use, or a worker died and took the pool with it
+            executor = ProcessPoolExecutor(max_workers=max(OCR_MAX_WORKERS, 1), 
+                                           mp_context=_MP_CONTEXT, 
+                                           initializer=_init_worker, 
+                                           initargs=key)
+            _background_pools[key] = executor
+            return executor.submit(_process_in_worker, 'process_image', str(image_path), preprocess)
+        
+    def process_images(self, 
+                       image_paths: Iterable[Union[str, Path]], 
+                       preprocess: bool = True, 
+                       max_workers: Optional[int] = None) -> List[str]:
+        """
+        Extract text from several images in parallel.
+        
+        Args:
+            image_paths: Paths to the image files
+            preprocess: Whether to preprocess the images
+            max_workers: Maximum number of worker processes (default: OCR_MAX_WORKERS)
+            
+        Returns:
+            Extracted text for each image, in order; empty for images where OCR failed
+        """
+        texts = self._process_batch('process_image', image_paths, preprocess, max_workers)
+        return [text if text is not None else "" for text in texts]
+        
+    def process_images_with_confidence(self, 
+                                       image_paths: Iterable[Union[str, Path]], 
+                                       preprocess: bool = True, 
+                                       max_workers: Optional[int] = None) -> List[Optional[Dict[str, Any]]]:
+        """
+        Extract text with confidence scores from several images in parallel.
+        
+        Args:
+            image_paths: Paths to the image files
+            preprocess: Whether to preprocess the images
+            max_workers: Maximum number of worker processes (default: OCR_MAX_WORKERS)
+            
+        Returns:
+            Result of process_image_with_confidence for each image, in order;
+            None for images where OCR failed
+        """
+        return self._process_batch('process_image_with_confidence', image_paths, preprocess, max_workers)
+        
+    def _process_batch(self, 
+                       method: str, 
+                       image_paths: Iterable[Union[str, Path]], 
+                       preprocess: bool, 
+                       max_workers: Optional[int]) -> List[Any]:
+        """
+        Run a single-image method over several images using a process pool.
+        
+        Each image is submitted as soon as the iterable yields it. Falls back
+        to sequential OCR in this process when only one worker is requested.
+        
+        Args:
+            method: Name of the single-image method to run
+            image_paths: Paths to the image files
+            preprocess: Whether to preprocess the images
+            max_workers: Maximum number of worker processes (default: OCR_MAX_WORKERS)
+            
+        Returns:
+            Result for each image, in order; None for images where OCR failed
+        """
+        if max_workers is None:
+            max_workers = OCR_MAX_WORKERS
+            
+        results = []
+        if max_workers <= 1:
+            for image_path in image_paths:
+                try:
+                    results.append(getattr(self, method)(image_path, preprocess=preprocess))
+                except Exception as e:
+                    logger.error(f"OCR failed for {image_path}: {str(e)}")
+                    results.append(None)
+            return results
+            
+        with ProcessPoolExecutor(max_workers=max_workers, 
+                                 mp_context=_MP_CONTEXT, 
+                                 initializer=_init_worker, 
+                                 initargs=(self.lang, self.config)) as executor:
+            submitted = [(image_path, executor.submit(_process_in_worker, method, str(image_path), preprocess)) 
+                         for image_path in image_paths]
+            
+            for image_path, future in submitted:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    logger.error(f"OCR failed for {image_path}: {str(e)}")
+                    results.append(None)
+                    
+        return results
+        
+    def _load_image(self, image_path: ImageSource, preprocess: bool) -> Image.Image:
+        """
+        Get a PIL image ready for Tesseract from a path or decoded image.
+        
+        Args:
+            image_path: Path to the image file, or an already decoded image
+            preprocess: Whether to preprocess the image
+            
+        Returns:
+            PIL Image to pass to Tesseract
+        """
+        if isinstance(image_path, (str, Path)):
+            image_path = Path(image_path)
+            
+        if preprocess:
+            return self.preprocessor.preprocess(image_path)
+            
+        if isinstance(image_path, Path):
+            return Image.open(image_path)
+            
+        if isinstance(image_path, np.ndarray):
+            if image_path.ndim == 3:
+                image_path = cv2.cvtColor(image_path, cv2.COLOR_BGR2RGB)
+            return Image.fromarray(image_path)
+            
+        return image_path
+        
     def cleanup_text(self, text: str) -> str:
         """
         Clean up OCR text output.
@@ -132,30 +332,20 @@ class OCREngine:
             return ""
             
         # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_RE.sub(' ', text)
         
         # Fix line breaks (keep paragraph structure)
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        
-        # Common OCR error corrections
-        replacements = {
-            '|': 'I',             # Vertical bar to letter I
-            '{': '(',             # Common bracket confusions
-            '}': ')',
-            '0': 'O',             # Common number/letter confusions in context
-            '1': 'I',
-            '5': 'S',
-        }
-        
-        # Only replace when it makes sense (surrounded by letters)
-        for err, fix in replacements.items():
-            # Look for the error character between letters
-            text = re.sub(f'(?<=[a-zA-Z]){re.escape(err)}(?=[a-zA-Z])', fix, text)
+        text = _EXTRA_NEWLINES_RE.sub('\n\n', text)
+        
+        # Common OCR error corrections, in a single pass. Only replace when it
+        # makes sense (surrounded by letters); a replaced character is never
+        # next to another one, so this matches replacing them one at a time
+        text = _OCR_ERROR_RE.sub(lambda m: _OCR_REPLACEMENTS[m.group(1)], text)
         
         # Fix spacing around punctuation
-        text = re.sub(r'\s+([.,;:!?])', r'\1', text)
+        text = _SPACE_BEFORE_PUNCT_RE.sub(r'\1', text)
         
         # Fix common spacing issues
-        text = re.sub(r'(\w)\s+(\')(\w)', r'\1\2\3', text)  # Fix a ' s -> a's
+        text = _SPACED_APOSTROPHE_RE.sub(r'\1\2\3', text)  # Fix a ' s -> a's
         
         return text.strip()
\ No newline at end of file
@@ -1,58 +1,97 @@
 """Image preprocessing for better OCR results."""
 
+import os
 import cv2
 import numpy as np
+from functools import lru_cache
 from pathlib import Path
-from PIL import Image
+from PIL import Image, ImageOps
 import logging
 from typing import Tuple, Optional, Union
 
-from ..config import IMAGE_RESIZE_WIDTH, THRESHOLD_MIN
+from ..config import IMAGE_RESIZE_WIDTH, THRESHOLD_MIN, DENOISE_METHOD, PREPROCESS_CACHE_SIZE
 
 logger = logging.getLogger(__name__)
 
+# cv2.imread flags that decode straight to grayscale at 1/8, 1/4 or 1/2 size,
+# largest reduction first
+_REDUCED_GRAYSCALE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+    (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    (2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+)
+
 class ImagePreprocessor:
     """Handles preprocessing of images for better OCR results."""
     
     @staticmethod
-    def preprocess(image_path: Union[str, Path], 
+    def preprocess(image_path: Union[str, Path, np.ndarray, Image.Image], 
                   resize: Optional[Tuple[int, int]] = None, 
                   denoise: bool = True, 
                   threshold: bool = True,
-                  deskew: bool = True) -> Image.Image:
+                  deskew: bool = True,
+                  denoise_method: str = DENOISE_METHOD) -> Image.Image:
         """
         Preprocess an image for OCR.
         
         Args:
-            image_path: Path to the image file
+            image_path: Path to the image file, or an already decoded image
+                (PIL image or BGR/grayscale array)
             resize: Optional tuple (width, height) for resizing
             denoise: Apply noise reduction
             threshold: Apply adaptive thresholding
             deskew: Correct image skew
+            denoise_method: Noise reduction filter, one of "none", "median",
+                "bilateral" or "nlm" (non-local means, by far the slowest)
             
         Returns:
             PIL Image ready for OCR
         """
         logger.info(f"Preprocessing image: {image_path}")
         
-        # Read image
-        img = cv2.imread(str(image_path))
-        if img is None:
-            raise ValueError(f"Failed to load image: {image_path}")
+        if isinstance(image_path, (str, Path)):
+            try:
+                mtime = os.path.getmtime(image_path)
+            except OSError:
+                raise ValueError(f"Failed to load image: {image_path}")
+                
+            # Repeated calls for an unchanged file reuse the earlier result
+            gray = _preprocess_file(str(image_path), mtime, tuple(resize) if resize else None, 
+                                    denoise, threshold, deskew, denoise_method)
+        else:
+            gray = ImagePreprocessor._preprocess_array(
+                ImagePreprocessor._to_grayscale(image_path), 
+                resize, denoise, threshold, deskew, denoise_method
+            )
             
-        # Convert to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        # Convert to PIL Image for Tesseract
+        pil_img = Image.fromarray(gray)
         
-        # Resize if needed
-        if resize:
-            width, height = resize
-            gray = cv2.resize(gray, (width, height))
-        elif IMAGE_RESIZE_WIDTH > 0:
-            # Resize to fixed width while maintaining aspect ratio
-            height, width = gray.shape[:2]
-            ratio = IMAGE_RESIZE_WIDTH / width
-            new_height = int(height * ratio)
-            gray = cv2.resize(gray, (IMAGE_RESIZE_WIDTH, new_height))
+        return pil_img
+        
+    @staticmethod
+    def _preprocess_array(gray: np.ndarray, 
+                          resize: Optional[Tuple[int, int]], 
+                          denoise: bool, 
+                          threshold: bool, 
+                          deskew: bool, 
+                          denoise_method: str) -> np.ndarray:
+        """
+        Run the preprocessing steps on a grayscale image.
+        
+        Args:
+            gray: Grayscale image as numpy array
+            resize: Optional tuple (width, height) for resizing
+            denoise: Apply noise reduction
+            threshold: Apply adaptive thresholding
+            deskew: Correct image skew
+            denoise_method: Noise reduction filter
+            
+        Returns:
+            Preprocessed grayscale image
+        """
+        # Resize before any per-pixel work
+        gray = ImagePreprocessor._resize(gray, resize)
         
         # Deskew if requested
         if deskew:
@@ -60,7 +99,7 @@ class ImagePreprocessor:
         
         # Apply denoising
         if denoise:
-            gray = cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
+            gray = ImagePreprocessor._denoise(gray, denoise_method)
             
         # Apply thresholding
         if threshold:
@@ -69,10 +108,115 @@ class ImagePreprocessor:
                 cv2.THRESH_BINARY, 11, 2
             )
             
-        # Convert to PIL Image for Tesseract
-        pil_img = Image.fromarray(gray)
+        return gray
         
-        return pil_img
+    @staticmethod
+    def _imread_flags(image_path: Union[str, Path], resize: Optional[Tuple[int, int]]) -> int:
+        """
+        Choose cv2.imread flags that decode to grayscale, at reduced size when the
+        image is much larger than the resize target.
+        
+        Args:
+            image_path: Path to the image file
+            resize: Optional tuple (width, height) the image will be resized to
+            
+        Returns:
+            Flags for cv2.imread
+        """
+        try:
+            # Only the header is read
+            with Image.open(image_path) as img:
+                width, height = img.size
+        except Exception:
+            return cv2.IMREAD_GRAYSCALE
+            
+        if resize:
+            target_width, target_height = resize
+        elif IMAGE_RESIZE_WIDTH > 0:
+            # The decoder may rotate the image from its EXIF orientation, so
+            # either side could end up as the width
+            width = height = min(width, height)
+            target_width, target_height = IMAGE_RESIZE_WIDTH, 0
+        else:
+            return cv2.IMREAD_GRAYSCALE
+            
+        for factor, flags in _REDUCED_GRAYSCALE_FLAGS:
+            if width // factor >= target_width and height // factor >= target_height:
+                return flags
+                
+        return cv2.IMREAD_GRAYSCALE
+        
+    @staticmethod
+    def _resize(image: np.ndarray, resize: Optional[Tuple[int, int]]) -> np.ndarray:
+        """
+        Resize an image to the requested size or to IMAGE_RESIZE_WIDTH.
+        
+        Args:
+            image: Image as numpy array
+            resize: Optional tuple (width, height) for resizing
+            
+        Returns:
+            Resized image
+        """
+        height, width = image.shape[:2]
+        
+        if resize:
+            new_width, new_height = resize
+        elif IMAGE_RESIZE_WIDTH > 0:
+            # Resize to fixed width while maintaining aspect ratio
+            ratio = IMAGE_RESIZE_WIDTH / width
+            new_width, new_height = IMAGE_RESIZE_WIDTH, int(height * ratio)
+        else:
+            return image
+            
+        # Area interpolation avoids aliasing when shrinking
+        interpolation = cv2.INTER_AREA if new_width < width else cv2.INTER_LINEAR
+        return cv2.resize(image, (new_width, new_height), interpolation=interpolation)
+        
+    @staticmethod
+    def _to_grayscale(image: Union[np.ndarray, Image.Image]) -> np.ndarray:
+        """
+        Convert an in-memory image to a grayscale array.
+        
+        PIL images are turned upright from their EXIF orientation first, as
+        cv2.imread does for images read from a path.
+        
+        Args:
+            image: PIL image, or array in OpenCV's BGR or grayscale layout
+            
+        Returns:
+            Grayscale image as numpy array
+        """
+        if isinstance(image, Image.Image):
+            return np.asarray(ImageOps.exif_transpose(image).convert('L'))
+            
+        if image.ndim == 2:
+            return image
+            
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        
+    @staticmethod
+    def _denoise(image: np.ndarray, method: str) -> np.ndarray:
+        """
+        Reduce noise in a grayscale image.
+        
+        Args:
+            image: Grayscale image as numpy array
+            method: "none", "median", "bilateral" or "nlm"
+            
+        Returns:
+            Denoised image
+        """
+        if method == "none":
+            return image
+        if method == "median":
+            return cv2.medianBlur(image, 3)
+        if method == "bilateral":
+            return cv2.bilateralFilter(image, 5, 50, 50)
+        if method == "nlm":
+            return cv2.fastNlMeansDenoising(image, None, 10, 7, 21)
+            
+        raise ValueError(f"Unknown denoise method: {method}")
         
     @staticmethod
     def _deskew(image: np.ndarray) -> np.ndarray:
@@ -85,18 +229,28 @@ class ImagePreprocessor:
         Returns:
             Deskewed image
         """
+        # The skew angle does not change with scale, so find it on a quarter
+        # size copy. Nearest-neighbour sampling keeps thresholding exact.
+        small = cv2.resize(image, None, fx=0.25, fy=0.25, interpolation=cv2.INTER_NEAREST)
+        
         # Threshold to find all text contours
-        thresh = cv2.threshold(image, THRESHOLD_MIN, 255, 
+        thresh = cv2.threshold(small, THRESHOLD_MIN, 255, 
                              cv2.THRESH_BINARY_INV)[1] 
         
-        # Find contours and calculate bounding box
-        coords = np.column_stack(np.where(thresh > 0))
+        # Find the outer contours of the text; their points have the same
+        # convex hull as all text pixels, so the bounding box is unchanged
+        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
         # If no valid coordinates, return original image
-        if len(coords) <= 10:
+        if not contours:
+            return image
+            
+        coords = np.vstack(contours).reshape(-1, 2)
+        if len(coords) < 20:
             return image
             
-        angle = cv2.minAreaRect(coords)[-1]
+        # Contours give (x, y) points; minAreaRect is fed (y, x) as before
+        angle = cv2.minAreaRect(coords[:, ::-1])[-1]
         
         # Adjust angle
         if angle < -45:
@@ -134,4 +288,32 @@ class ImagePreprocessor:
         clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
         enhanced = clahe.apply(image)
         
-        return enhanced
\ No newline at end of file
+        return enhanced
+
+@lru_cache(maxsize=PREPROCESS_CACHE_SIZE)
+def _preprocess_file(image_path: str, 
+                     mtime: float, 
+                     resize: Optional[Tuple[int, int]], 
+                     denoise: bool, 
+                     threshold: bool, 
+                     deskew: bool, 
+                     denoise_method: str) -> np.ndarray:
+    """
+    Read and preprocess an image file, caching the result.
+    
+    The modification time is part of the cache key so an edited file is
+    processed again. The returned array is shared between callers and is
+    marked read-only.
+    
+    Returns:
+        Preprocessed grayscale image
+    """
+    # Read image as grayscale, letting the decoder skip detail that
+    # resizing would discard
+    gray = cv2.imread(image_path, ImagePreprocessor._imread_flags(image_path, resize))
+    if gray is None:
+        raise ValueError(f"Failed to load image: {image_path}")
+        
+    gray = ImagePreprocessor._preprocess_array(gray, resize, denoise, threshold, deskew, denoise_method)
+    gray.flags.writeable = False
+    return gray
\ No newline at end of file
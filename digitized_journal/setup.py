@@ -20,6 +20,8 @@ setup(
     ],
     extras_require={
         "web": ["streamlit>=1.10.0"],
+        # Drop-in SIMD build of Pillow; uninstall pillow first, both provide PIL
+        "simd": ["pillow-simd>=9.0.0"],
         "dev": ["pytest>=7.0.0", "black>=22.0.0", "flake8>=4.0.0"],
     },
     entry_points={
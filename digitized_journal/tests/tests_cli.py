@@ -0,0 +1,22 @@
+"""Test cases for the command-line interface."""
+
+import unittest
+from datetime import datetime
+
+from digitized_journal.ui.cli import JournalCLI
+
+class TestJournalCLI(unittest.TestCase):
+    """Test the command-line interface helpers."""
+    
+    def test_parse_date(self):
+        """Test only YYYY-MM-DD dates are accepted."""
+        self.assertEqual(JournalCLI._parse_date("2024-03-07"), datetime(2024, 3, 7))
+        self.assertEqual(JournalCLI._parse_date("2024-3-7"), datetime(2024, 3, 7))
+        
+        # Other ISO 8601 forms and invalid dates are rejected
+        for date_str in ("2024-W01-1", "20240307", "2024-02-30", "2024/03/07", ""):
+            with self.assertRaises(ValueError):
+                JournalCLI._parse_date(date_str)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+"""Test cases for the database module."""
+
+import unittest
+from unittest.mock import MagicMock
+
+from sqlalchemy import func, select
+
+from digitized_journal.database.db_interface import DatabaseManager
+from digitized_journal.database.models import Page, entry_tag_association, pages_fts
+from digitized_journal.entries.entry_manager import EntryManager
+
+class TestDatabaseManager(unittest.TestCase):
+    """Test the database manager functionality."""
+    
+    def setUp(self):
+        """Set up test environment."""
+        # Use a fresh in-memory database for each test
+        self.db_manager = DatabaseManager('sqlite:///:memory:')
+        self.db_manager.initialize_database()
+        
+    def tearDown(self):
+        """Clean up test environment."""
+        self.db_manager.close_sessions()
+        self.db_manager.engine.dispose()
+        
+    def test_read_after_write(self):
+        """Test entries from a read stay usable after a write on the same thread."""
+        entry_id = self.db_manager.create_entry(title="First")
+        entries = self.db_manager.get_all_entries()
+        
+        # Write through each kind of write method
+        self.db_manager.create_entry(title="Second")
+        self.db_manager.update_entry(entry_id, title="Renamed")
+        with self.db_manager.transaction() as session:
+            self.assertIsNotNone(session)
+            
+        # Check the earlier result is still attached and sees the update
+        self.assertEqual(entries[0].title, "Renamed")
+        self.assertEqual(entries[0].pages, [])
+        self.assertEqual(len(self.db_manager.get_all_entries()), 2)
+        
+    def test_read_after_read(self):
+        """Test entries from a read stay usable after another read on the same thread."""
+        self._add_entry_with_text("first page")
+        self._add_entry_with_text("second page")
+        entries = self.db_manager.get_all_entries()
+        
+        manager = EntryManager(self.db_manager, ocr_engine=MagicMock())
+        self.assertIsNotNone(manager.get_entry_with_pages(entries[1].id))
+        
+        # Check the earlier result can still load deferred page columns
+        self.assertEqual(sorted(entry.pages[0].text_content for entry in entries), 
+                         ["first page", "second page"])
+        
+    def _add_entry_with_text(self, text_content, tags=None):
+        """Create an entry with one page of text and return (entry ID, page ID)."""
+        entry_id = self.db_manager.create_entry(title="Entry", tags=tags)
+        page_id = self.db_manager.add_page(entry_id, 1, f"page_{entry_id}.jpg", text_content)
+        return entry_id, page_id
+        
+    def _search_ids(self, query):
+        """Get the IDs of the entries matching a query."""
+        return [entry.id for entry in self.db_manager.search_entries(query)]
+        
+    def test_fts_search(self):
+        """Test full-text search matches words and word prefixes only."""
+        self.assertTrue(self.db_manager.fts_enabled)
+        entry_id, _ = self._add_entry_with_text("Went Running on Sunday")
+        
+        # Whole words, prefixes of the last word and phrases match
+        self.assertEqual(self._search_ids("sunday"), [entry_id])
+        self.assertEqual(self._search_ids("run"), [entry_id])
+        self.assertEqual(self._search_ids("running on"), [entry_id])
+        
+        # Text inside a word does not
+        self.assertEqual(self._search_ids("unn"), [])
+        self.assertEqual(self._search_ids("day"), [])
+        
+        # Snippets come from the matching page
+        results = self.db_manager.search_entries_with_snippets("sun")
+        self.assertEqual(results[0][1], 1)
+        self.assertIn("Sunday", results[0][2])
+        
+    def test_like_search_fallback(self):
+        """Test search without FTS5 matches any substring."""
+        entry_id, _ = self._add_entry_with_text("Went Running on Sunday")
+        self.db_manager.fts_enabled = False
+        
+        self.assertEqual(self._search_ids("unn"), [entry_id])
+        self.assertEqual(self._search_ids("DAY"), [entry_id])
+        self.assertEqual(self._search_ids("walking"), [])
+        
+        results = self.db_manager.search_entries_with_snippets("unn")
+        self.assertIn("Running", results[0][2])
+        
+        # Text whose lower-cased form is longer still gets a snippet around the match
+        self._add_entry_with_text("\u0130" * 100 + " found the needle")
+        results = self.db_manager.search_entries_with_snippets("needle")
+        self.assertIn("needle", results[0][2])
+        
+    def test_fts_index_follows_updates_and_deletes(self):
+        """Test the FTS triggers keep the index in sync with page text."""
+        entry_id, page_id = self._add_entry_with_text("morning walk")
+        
+        self.db_manager.update_page_text(page_id, "evening swim")
+        self.assertEqual(self._search_ids("walk"), [])
+        self.assertEqual(self._search_ids("swim"), [entry_id])
+        
+        self.db_manager.delete_page(page_id)
+        self.assertEqual(self._search_ids("swim"), [])
+        
+    def test_delete_entry_removes_dependent_rows(self):
+        """Test deleting an entry removes its pages, tag links and index rows."""
+        entry_id, page_id = self._add_entry_with_text("garden notes", tags=["home"])
+        
+        self.assertTrue(self.db_manager.delete_entry(entry_id))
+        self.assertFalse(self.db_manager.delete_entry(entry_id))
+        
+        session = self.db_manager.get_session()
+        self.assertEqual(session.scalar(select(func.count()).select_from(Page)), 0)
+        self.assertEqual(session.scalar(select(func.count()).select_from(entry_tag_association)), 0)
+        self.assertIsNone(session.scalar(
+            select(pages_fts.c.rowid).where(pages_fts.c.rowid == page_id)
+        ))
+        self.assertEqual(self._search_ids("garden"), [])
+        
+    def test_text_reuse_by_image_hash(self):
+        """Test only unedited OCR text with the same preprocess setting is reused."""
+        entry_id = self.db_manager.create_entry()
+        page_id = self.db_manager.add_page(entry_id, 1, "page.jpg", "ocr text", 
+                                           image_sha256="abc", ocr_preprocessed=True)
+        
+        self.assertEqual(self.db_manager.get_text_by_image_hash("abc", True), "ocr text")
+        self.assertIsNone(self.db_manager.get_text_by_image_hash("abc", False))
+        
+        # Edited text is no longer reused
+        self.db_manager.update_page_text(page_id, "edited text")
+        self.assertIsNone(self.db_manager.get_text_by_image_hash("abc", True))
+        
+    def test_add_pages_bulk(self):
+        """Test bulk page inserts return IDs in order without changing the rows."""
+        entry_id = self.db_manager.create_entry()
+        rows = [
+            {'entry_id': entry_id, 'page_number': i, 'image_path': f"page_{i}.jpg", 
+             'text_content': f"Page {i}"}
+            for i in (1, 2)
+        ]
+        
+        page_ids = self.db_manager.add_pages_bulk(rows)
+        self.assertEqual(len(page_ids), 2)
+        self.assertEqual(rows[0], {'entry_id': entry_id, 'page_number': 1, 
+                                   'image_path': "page_1.jpg", 'text_content': "Page 1"})
+        
+        session = self.db_manager.get_session()
+        for page_id, row in zip(page_ids, rows):
+            page = session.get(Page, page_id)
+            self.assertEqual(page.page_number, row['page_number'])
+            self.assertEqual(page.text_content_lc, row['text_content'].lower())
+        
+    def test_tag_usage_counts(self):
+        """Test the tag usage counters follow tag changes and deletes."""
+        first_id = self.db_manager.create_entry(tags=["work", "travel"])
+        second_id = self.db_manager.create_entry(tags=["work"])
+        self.assertEqual(self.db_manager.get_most_used_tags(), [("work", 2), ("travel", 1)])
+        
+        self.db_manager.update_entry(first_id, tags=["travel", "family"])
+        self.assertEqual(sorted(self.db_manager.get_most_used_tags()), 
+                         [("family", 1), ("travel", 1), ("work", 1)])
+        
+        self.db_manager.delete_entry(second_id)
+        self.assertEqual(sorted(self.db_manager.get_most_used_tags()), 
+                         [("family", 1), ("travel", 1)])
+        
+        # Statistics read the same counters
+        self.assertEqual(sorted(self.db_manager.compute_stats()['tags']), 
+                         [("family", 1), ("travel", 1)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""Test cases for the entries module."""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from digitized_journal.database.db_interface import DatabaseManager
+from digitized_journal.entries.entry_manager import EntryManager
+
+class TestEntryManager(unittest.TestCase):
+    """Test the entry manager functionality."""
+    
+    def setUp(self):
+        """Set up test environment."""
+        # Store images in a temporary directory and use an in-memory database
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.images_dir = self.test_dir / "images"
+        images_patch = patch('digitized_journal.entries.entry_manager.IMAGES_DIR', self.images_dir)
+        images_patch.start()
+        self.addCleanup(images_patch.stop)
+        
+        self.db_manager = DatabaseManager('sqlite:///:memory:')
+        self.db_manager.initialize_database()
+        self.entry_manager = EntryManager(self.db_manager, ocr_engine=MagicMock())
+        
+    def tearDown(self):
+        """Clean up test environment."""
+        self.db_manager.close_sessions()
+        self.db_manager.engine.dispose()
+        shutil.rmtree(self.test_dir)
+        
+    def test_add_invalid_image(self):
+        """Test an image that can't be decoded is stored as a page with empty text."""
+        image_path = self.test_dir / "not_an_image.jpg"
+        image_path.write_bytes(b"not image data")
+        entry_id = self.entry_manager.create_entry()
+        
+        page_id = self.entry_manager.add_page_from_image(entry_id, image_path)
+        
+        entry = self.entry_manager.get_entry_with_pages(entry_id)
+        self.assertEqual([page.id for page in entry.pages], [page_id])
+        self.assertEqual(entry.pages[0].text_content, "")
+        self.assertTrue(Path(entry.pages[0].image_path).exists())
+        
+    def test_failed_add_removes_stored_images(self):
+        """Test images stored by a failed multi-page add are deleted again."""
+        valid_path = self.test_dir / "valid.jpg"
+        valid_path.write_bytes(b"image data")
+        missing_path = self.test_dir / "missing.jpg"
+        entry_id = self.entry_manager.create_entry()
+        
+        # OCR every image it is given, failing on none of them
+        self.entry_manager.ocr_engine.process_images_with_confidence.side_effect = (
+            lambda image_paths, **kwargs: [None for _ in image_paths]
+        )
+        
+        for image_paths in ([valid_path, missing_path], [missing_path, valid_path]):
+            with self.assertRaises(FileNotFoundError):
+                self.entry_manager.add_multiple_pages(entry_id, image_paths)
+            self.assertEqual(self.entry_manager.get_entry_with_pages(entry_id).pages, [])
+            self.assertEqual(list((self.images_dir / str(entry_id)).iterdir()), [])
+
+if __name__ == '__main__':
+    unittest.main()
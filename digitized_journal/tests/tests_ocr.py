@@ -5,6 +5,9 @@ import unittest
 from pathlib import Path
 import tempfile
 import shutil
+import cv2
+import numpy as np
+from PIL import Image
 from unittest.mock import patch, MagicMock
 
 from digitized_journal.ocr.preprocessor import ImagePreprocessor
@@ -27,17 +30,18 @@ class TestImagePreprocessor(unittest.TestCase):
     @patch('cv2.cvtColor')
     @patch('cv2.resize')
     @patch('cv2.adaptiveThreshold')
-    @patch('cv2.fastNlMeansDenoising')
+    @patch('cv2.medianBlur')
     @patch('PIL.Image.fromarray')
     def test_preprocess(self, mock_fromarray, mock_denoise, mock_threshold, 
                        mock_resize, mock_cvtcolor, mock_imread):
         """Test image preprocessing pipeline."""
-        # Mock the CV2 functions
-        mock_imread.return_value = MagicMock()
+        # Mock the CV2 functions; the pipeline reads image shapes, so they
+        # return blank grayscale arrays
+        mock_imread.return_value = np.zeros((100, 300), dtype=np.uint8)
         mock_cvtcolor.return_value = MagicMock()
-        mock_resize.return_value = MagicMock()
-        mock_denoise.return_value = MagicMock()
-        mock_threshold.return_value = MagicMock()
+        mock_resize.return_value = np.zeros((600, 1800), dtype=np.uint8)
+        mock_denoise.return_value = np.zeros((600, 1800), dtype=np.uint8)
+        mock_threshold.return_value = np.zeros((600, 1800), dtype=np.uint8)
         mock_fromarray.return_value = MagicMock()
         
         # Create test image file
@@ -50,9 +54,11 @@ class TestImagePreprocessor(unittest.TestCase):
         result = preprocessor.preprocess(test_image)
         
         # Check that functions were called
-        mock_imread.assert_called_once_with(str(test_image))
-        mock_cvtcolor.assert_called_once()
-        mock_resize.assert_called_once()
+        mock_imread.assert_called_once_with(str(test_image), cv2.IMREAD_GRAYSCALE)
+        mock_cvtcolor.assert_not_called()
+        # Once to the target width, once for the reduced copy deskew measures
+        self.assertEqual(mock_resize.call_count, 2)
+        self.assertEqual(mock_resize.call_args_list[0][0][1], (1800, 600))
         mock_denoise.assert_called_once()
         mock_threshold.assert_called_once()
         mock_fromarray.assert_called_once()
@@ -72,6 +78,23 @@ class TestImagePreprocessor(unittest.TestCase):
         with self.assertRaises(ValueError):
             preprocessor.preprocess(test_file)
             
+    def test_exif_orientation_in_memory(self):
+        """Test in-memory images are rotated from EXIF like images read from disk."""
+        # Save a landscape JPEG tagged to be displayed rotated 90 degrees
+        test_image = self.test_dir / "rotated.jpg"
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        Image.new('RGB', (300, 100), 'white').save(test_image, exif=exif)
+        
+        # Preprocess from the path and from an opened image
+        from_path = ImagePreprocessor.preprocess(test_image)
+        with Image.open(test_image) as image:
+            from_memory = ImagePreprocessor.preprocess(image)
+            
+        # Check both are portrait and the same size
+        self.assertEqual(from_path.size, (1800, 5400))
+        self.assertEqual(from_memory.size, from_path.size)
+        
 class TestOCREngine(unittest.TestCase):
     """Test the OCR engine functionality."""
     
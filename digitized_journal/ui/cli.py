@@ -1,23 +1,32 @@
 """Command-line interface for the journal application."""
 
 import os
+import re
 import sys
 import cmd
 import glob
 import logging
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import List, Optional, Tuple, Dict
 
 from ..database.db_interface import DatabaseManager
 from ..entries.entry_manager import EntryManager
-from ..entries.exporter import EntryExporter
 from ..utils.file_utils import verify_image_file
 from ..config import DATA_DIR
 
+try:
+    import readline
+except ImportError:  # Not available on Windows
+    readline = None
+
 logger = logging.getLogger(__name__)
 
+# Dates fromisoformat parses exactly as strptime("%Y-%m-%d") would
+_ISO_DATE_RE = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}')
+
 class JournalCLI(cmd.Cmd):
     """Interactive command-line interface for the journal application."""
     
@@ -27,19 +36,106 @@ class JournalCLI(cmd.Cmd):
     """
     prompt = "journal> "
     
+    # General help is static, so it is assembled once
+    _HELP_TEXT = "\n".join([
+        "",
+        "Digital Journal Application",
+        "",
+        "Available commands:",
+        "  new                 - Create a new journal entry",
+        "  add_page            - Add a page to an entry",
+        "  add_pages           - Add every image matching a pattern to an entry",
+        "  list [limit]        - List all journal entries",
+        "  view <entry_id>     - View a specific entry",
+        "  search <query>      - Search for entries",
+        "  edit <entry_id>     - Edit an entry",
+        "  export <entry_id>   - Export an entry (md or pdf)",
+        "  delete <entry_id>   - Delete an entry",
+        "  stats               - Show journal statistics",
+        "  exit, quit          - Exit the application",
+        "",
+        "Type 'help <command>' for more detailed information.",
+        "",
+    ])
+    
     def __init__(self):
         """Initialize the CLI with necessary components."""
         super().__init__()
         self.db_manager = DatabaseManager()
         self.db_manager.initialize_database()
         self.entry_manager = EntryManager(db_manager=self.db_manager)
-        self.exporter = EntryExporter()
+        self._exporter = None
         self.current_entry_id = None
+        self._path_matches = []
+        
+        if readline is not None:
+            # Keep path separators inside the word being completed
+            readline.set_completer_delims(" \t\n")
+        
+    @property
+    def exporter(self):
+        """Entry exporter, imported and created the first time an export is run."""
+        if self._exporter is None:
+            from ..entries.exporter import EntryExporter
+            self._exporter = EntryExporter()
+        return self._exporter
         
     def emptyline(self):
         """Do nothing on empty line."""
         pass
         
+    def _path_candidates(self, text: str) -> List[str]:
+        """Get file paths starting with text, with directories ending in a separator."""
+        matches = sorted(glob.glob(os.path.expanduser(text) + '*'))
+        return [match + os.sep if os.path.isdir(match) else match for match in matches]
+        
+    def _complete_path(self, text: str, state: int) -> Optional[str]:
+        """Readline completer for file paths typed at an input prompt."""
+        if state == 0:
+            self._path_matches = self._path_candidates(text)
+        return self._path_matches[state] if state < len(self._path_matches) else None
+        
+    def _input_path(self, prompt: str) -> str:
+        """Prompt for a file path with tab-completion of file names."""
+        if readline is None:
+            return input(prompt)
+            
+        previous_completer = readline.get_completer()
+        readline.set_completer(self._complete_path)
+        try:
+            return input(prompt)
+        finally:
+            readline.set_completer(previous_completer)
+            
+    def complete_add_page(self, text, line, begidx, endidx):
+        """Complete the image path argument of add_page."""
+        # The path is the second argument, after the entry ID
+        if len(line[:begidx].split()) < 2:
+            return []
+        return self._path_candidates(text)
+        
+    @staticmethod
+    def _parse_entry_id(arg: str) -> Optional[int]:
+        """Parse an entry ID argument, returning None if it isn't a whole number."""
+        s = arg.strip()
+        if s.isdecimal() or (s.startswith('-') and s[1:].isdecimal()):
+            return int(s)
+        return None
+        
+    @staticmethod
+    def _parse_date(date_str: str) -> datetime:
+        """Parse a YYYY-MM-DD date, raising ValueError if it is malformed."""
+        # fromisoformat is much faster than strptime but also accepts other ISO
+        # forms such as week dates, so it only sees plain zero-padded dates
+        if _ISO_DATE_RE.fullmatch(date_str):
+            return datetime.fromisoformat(date_str)
+        return datetime.strptime(date_str, "%Y-%m-%d")
+        
+    def postcmd(self, stop, line):
+        """Release the database session once each command has finished."""
+        self.db_manager.close_sessions()
+        return stop
+        
     def do_exit(self, arg):
         """Exit the application."""
         print("Goodbye!")
@@ -60,7 +156,7 @@ class JournalCLI(cmd.Cmd):
                 
             date_str = input("Date (YYYY-MM-DD, empty for today): ").strip()
             if date_str:
-                date = datetime.strptime(date_str, "%Y-%m-%d")
+                date = self._parse_date(date_str)
             else:
                 date = datetime.now()
                 
@@ -87,35 +183,59 @@ class JournalCLI(cmd.Cmd):
             print(f"Error creating entry: {str(e)}")
             
     def _add_pages_interactive(self, entry_id: int) -> None:
-        """Interactive helper to add pages to an entry."""
+        """
+        Interactive helper to add pages to an entry.
+        
+        The image paths are collected first and the pages are then added in
+        a single batch, so OCR runs in parallel and the pages are written in
+        one transaction instead of one commit per page.
+        """
+        image_paths = []
         while True:
             add_page = input("Add a page? (y/n): ").lower().strip()
             if add_page != 'y':
                 break
                 
             # Get image path
-            image_path = input("Enter image file path: ").strip()
+            image_path = self._input_path("Enter image file path: ").strip()
             if not image_path:
                 continue
                 
             image_path = Path(image_path)
-            if not image_path.exists():
-                print(f"File not found: {image_path}")
-                continue
-                
-            if not verify_image_file(image_path):
-                print(f"Not a valid image file: {image_path}")
+            if not self._check_image_file(image_path):
                 continue
                 
-            try:
-                page_id = self.entry_manager.add_page_from_image(
-                    entry_id=entry_id,
-                    image_path=image_path
-                )
+            image_paths.append(image_path)
+            
+        if not image_paths:
+            return
+            
+        try:
+            print(f"Processing {len(image_paths)} page(s)...")
+            page_ids = self.entry_manager.add_multiple_pages(
+                entry_id=entry_id,
+                image_paths=image_paths
+            )
+            for page_id in page_ids:
                 print(f"Added page with ID: {page_id}")
-            except Exception as e:
-                print(f"Error adding page: {str(e)}")
+        except Exception as e:
+            print(f"Error adding pages: {str(e)}")
                 
+    def _check_image_file(self, image_path: Path) -> bool:
+        """Check an image path given by the user, printing why it can't be used."""
+        # A single stat both checks the file exists and is reused by the verification
+        try:
+            st = image_path.stat()
+        except FileNotFoundError:
+            print(f"File not found: {image_path}")
+            return False
+            
+        if not verify_image_file(image_path, st):
+            print(f"Not a valid image file: {image_path}")
+            return False
+            
+        return True
+        
     def do_add_page(self, arg):
         """Add a page to an entry: add_page <entry_id> <image_path>"""
         args = arg.split(maxsplit=1)
@@ -124,16 +244,15 @@ class JournalCLI(cmd.Cmd):
             print("Usage: add_page <entry_id> <image_path>")
             return
             
+        entry_id = self._parse_entry_id(args[0])
+        if entry_id is None:
+            print("Invalid entry ID. Please provide a valid number.")
+            return
+            
         try:
-            entry_id = int(args[0])
             image_path = Path(args[1].strip())
             
-            if not image_path.exists():
-                print(f"File not found: {image_path}")
-                return
-                
-            if not verify_image_file(image_path):
-                print(f"Not a valid image file: {image_path}")
+            if not self._check_image_file(image_path):
                 return
                 
             page_id = self.entry_manager.add_page_from_image(
@@ -142,11 +261,55 @@ class JournalCLI(cmd.Cmd):
             )
             print(f"Added page with ID: {page_id}")
             
-        except ValueError:
-            print("Invalid entry ID. Please provide a valid number.")
         except Exception as e:
             print(f"Error adding page: {str(e)}")
             
+    def do_add_pages(self, arg):
+        """Add every image matching a pattern to an entry: add_pages <entry_id> <pattern>"""
+        args = arg.split(maxsplit=1)
+        
+        if len(args) < 2:
+            print("Usage: add_pages <entry_id> <pattern>")
+            return
+            
+        entry_id = self._parse_entry_id(args[0])
+        if entry_id is None:
+            print("Invalid entry ID. Please provide a valid number.")
+            return
+            
+        try:
+            image_paths = sorted(glob.iglob(os.path.expanduser(args[1].strip())))
+            if not image_paths:
+                print(f"No files match: {args[1].strip()}")
+                return
+                
+            # Verification is mostly file I/O, so the files are checked concurrently
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                valid = list(executor.map(verify_image_file, image_paths))
+                
+            for image_path, is_valid in zip(image_paths, valid):
+                if not is_valid:
+                    print(f"Skipping invalid image file: {image_path}")
+                    
+            image_paths = [path for path, is_valid in zip(image_paths, valid) if is_valid]
+            if not image_paths:
+                return
+                
+            print(f"Processing {len(image_paths)} page(s)...")
+            page_ids = self.entry_manager.add_multiple_pages(
+                entry_id=entry_id,
+                image_paths=image_paths
+            )
+            for page_id in page_ids:
+                print(f"Added page with ID: {page_id}")
+                
+        except Exception as e:
+            print(f"Error adding pages: {str(e)}")
+            
+    def complete_add_pages(self, text, line, begidx, endidx):
+        """Complete the path pattern argument of add_pages."""
+        return self.complete_add_page(text, line, begidx, endidx)
+        
     def do_list(self, arg):
         """List all journal entries: list [limit]"""
         try:
@@ -156,21 +319,18 @@ class JournalCLI(cmd.Cmd):
             return
             
         try:
-            entries = self.entry_manager.get_all_entries()
+            entries = self.entry_manager.list_entries_summary(limit)
             
-            if limit:
-                entries = entries[:limit]
-                
             if not entries:
                 print("No entries found.")
                 return
                 
-            print("\nJournal Entries:")
-            print("=" * 60)
+            # Collect the listing and write it out in one call
+            lines = ["", "Journal Entries:", "=" * 60]
             
-            for entry in entries:
+            for entry, page_count in entries:
                 # Format date
-                date_str = entry.date.strftime("%Y-%m-%d")
+                date_str = entry.date.date().isoformat()
                 
                 # Format title with fallback
                 title = entry.title or "(Untitled)"
@@ -178,12 +338,11 @@ class JournalCLI(cmd.Cmd):
                 # Format tags
                 tags_str = ", ".join(tag.name for tag in entry.tags) if entry.tags else ""
                 
-                # Format page count
-                page_count = len(entry.pages)
+                lines.append(f"ID: {entry.id} | Date: {date_str} | Title: {title}")
+                lines.append(f"Pages: {page_count} | Tags: {tags_str}")
+                lines.append("-" * 60)
                 
-                print(f"ID: {entry.id} | Date: {date_str} | Title: {title}")
-                print(f"Pages: {page_count} | Tags: {tags_str}")
-                print("-" * 60)
+            sys.stdout.write("\n".join(lines) + "\n")
                 
         except Exception as e:
             print(f"Error listing entries: {str(e)}")
@@ -194,42 +353,52 @@ class JournalCLI(cmd.Cmd):
             print("Usage: view <entry_id>")
             return
             
+        entry_id = self._parse_entry_id(arg)
+        if entry_id is None:
+            print("Invalid entry ID. Please provide a valid number.")
+            return
+            
         try:
-            entry_id = int(arg)
-            entry = self.entry_manager.get_entry_with_pages(entry_id)
+            result = self.entry_manager.get_entry_for_view(entry_id, preview_chars=500)
             
-            if not entry:
+            if not result:
                 print(f"Entry with ID {entry_id} not found.")
                 return
                 
+            entry, pages = result
             self.current_entry_id = entry_id
                 
-            print("\n" + "=" * 60)
-            print(f"Entry ID: {entry.id}")
-            print(f"Title: {entry.title or '(Untitled)'}")
-            print(f"Date: {entry.date.strftime('%Y-%m-%d %H:%M')}")
+            # Collect the entry and its pages and write them out in one call
+            lines = [
+                "",
+                "=" * 60,
+                f"Entry ID: {entry.id}",
+                f"Title: {entry.title or '(Untitled)'}",
+                f"Date: {entry.date.strftime('%Y-%m-%d %H:%M')}",
+            ]
             
             if entry.mood:
-                print(f"Mood: {entry.mood}")
+                lines.append(f"Mood: {entry.mood}")
                 
             if entry.tags:
                 tags_str = ", ".join(tag.name for tag in entry.tags)
-                print(f"Tags: {tags_str}")
+                lines.append(f"Tags: {tags_str}")
                 
-            print("=" * 60)
+            lines.append("=" * 60)
             
-            for page in entry.pages:
-                print(f"\nPage {page.page_number}:")
-                print(f"Image: {page.image_path}")
-                print("-" * 60)
-                if page.text_content:
-                    print(page.text_content[:500] + "..." if len(page.text_content) > 500 else page.text_content)
+            for page in pages:
+                lines.append("")
+                lines.append(f"Page {page.page_number}:")
+                lines.append(f"Image: {page.image_path}")
+                lines.append("-" * 60)
+                if page.preview:
+                    lines.append(page.preview[:500] + "..." if len(page.preview) > 500 else page.preview)
                 else:
-                    print("(No text content)")
-                print("-" * 60)
+                    lines.append("(No text content)")
+                lines.append("-" * 60)
+                
+            sys.stdout.write("\n".join(lines) + "\n")
                 
-        except ValueError:
-            print("Invalid entry ID. Please provide a valid number.")
         except Exception as e:
             print(f"Error viewing entry: {str(e)}")
             
@@ -250,7 +419,7 @@ class JournalCLI(cmd.Cmd):
                 if tag_part.startswith("tag:"):
                     tag = tag_part[4:].strip()
                     
-            entries = self.entry_manager.search_entries(query=query, tag=tag)
+            entries = self.entry_manager.search_entries_with_snippets(query=query, tag=tag)
             
             if not entries:
                 print("No matching entries found.")
@@ -259,9 +428,9 @@ class JournalCLI(cmd.Cmd):
             print(f"\nFound {len(entries)} matching entries:")
             print("=" * 60)
             
-            for entry in entries:
+            for entry, page_number, snippet in entries:
                 # Format date
-                date_str = entry.date.strftime("%Y-%m-%d")
+                date_str = entry.date.date().isoformat()
                 
                 # Format title with fallback
                 title = entry.title or "(Untitled)"
@@ -273,39 +442,26 @@ class JournalCLI(cmd.Cmd):
                 print(f"Tags: {tags_str}")
                 
                 # Show a snippet of text for context
-                for page in entry.pages:
-                    if page.text_content and query.lower() in page.text_content.lower():
-                        snippet = self._get_text_snippet(page.text_content, query)
-                        print(f"  Page {page.page_number}: ...{snippet}...")
-                        break
-                        
+                if snippet is not None:
+                    print(f"  Page {page_number}: ...{snippet}...")
+                    
                 print("-" * 60)
                 
         except Exception as e:
             print(f"Error searching entries: {str(e)}")
             
-    def _get_text_snippet(self, text: str, query: str, context_chars: int = 40) -> str:
-        """Extract a snippet of text around the query term."""
-        query_lower = query.lower()
-        text_lower = text.lower()
-        
-        pos = text_lower.find(query_lower)
-        if pos == -1:
-            return text[:80]  # Fallback if query not found
-            
-        start = max(0, pos - context_chars)
-        end = min(len(text), pos + len(query) + context_chars)
-        
-        return text[start:end]
-        
     def do_edit(self, arg):
         """Edit an entry: edit <entry_id>"""
         if not arg.strip():
             print("Usage: edit <entry_id>")
             return
             
+        entry_id = self._parse_entry_id(arg)
+        if entry_id is None:
+            print("Invalid entry ID. Please provide a valid number.")
+            return
+            
         try:
-            entry_id = int(arg)
             entry = self.entry_manager.get_entry_with_pages(entry_id)
             
             if not entry:
@@ -330,7 +486,7 @@ class JournalCLI(cmd.Cmd):
             new_date = None
             if new_date_str:
                 try:
-                    new_date = datetime.strptime(new_date_str, "%Y-%m-%d")
+                    new_date = self._parse_date(new_date_str)
                 except ValueError:
                     print("Invalid date format. Using current date.")
                     
@@ -386,8 +542,6 @@ class JournalCLI(cmd.Cmd):
             else:
                 print("Failed to update entry.")
                 
-        except ValueError:
-            print("Invalid entry ID. Please provide a valid number.")
         except Exception as e:
             print(f"Error editing entry: {str(e)}")
             
@@ -399,9 +553,12 @@ class JournalCLI(cmd.Cmd):
             print("Usage: export <entry_id> [format=md|pdf]")
             return
             
-        try:
-            entry_id = int(parts[0])
+        entry_id = self._parse_entry_id(parts[0])
+        if entry_id is None:
+            print("Invalid entry ID. Please provide a valid number.")
+            return
             
+        try:
             # Default format is markdown
             format_type = "md"
             
@@ -430,8 +587,6 @@ class JournalCLI(cmd.Cmd):
                 output_path = self.exporter.to_pdf(entry)
                 print(f"Entry exported to PDF: {output_path}")
                 
-        except ValueError:
-            print("Invalid entry ID. Please provide a valid number.")
         except Exception as e:
             print(f"Error exporting entry: {str(e)}")
             
@@ -441,19 +596,23 @@ class JournalCLI(cmd.Cmd):
             print("Usage: delete <entry_id>")
             return
             
-        try:
-            entry_id = int(arg)
+        entry_id = self._parse_entry_id(arg)
+        if entry_id is None:
+            print("Invalid entry ID. Please provide a valid number.")
+            return
             
-            # Get entry to confirm
-            entry = self.entry_manager.get_entry_with_pages(entry_id)
+        try:
+            # Get the title and date to confirm
+            header = self.entry_manager.get_entry_header(entry_id)
             
-            if not entry:
+            if not header:
                 print(f"Entry with ID {entry_id} not found.")
                 return
                 
             # Confirm deletion
-            title = entry.title or "(Untitled)"
-            date_str = entry.date.strftime("%Y-%m-%d")
+            title, date = header
+            title = title or "(Untitled)"
+            date_str = date.strftime("%Y-%m-%d")
             
             confirm = input(f"Are you sure you want to delete entry '{title}' from {date_str}? (y/n): ").lower().strip()
             
@@ -471,60 +630,33 @@ class JournalCLI(cmd.Cmd):
             else:
                 print("Failed to delete entry.")
                 
-        except ValueError:
-            print("Invalid entry ID. Please provide a valid number.")
         except Exception as e:
             print(f"Error deleting entry: {str(e)}")
             
     def do_stats(self, arg):
         """Show journal statistics."""
         try:
-            session = self.db_manager.get_session()
-            
-            try:
-                from ..database.models import Entry, Page, Tag
-                from sqlalchemy import func
-                
-                # Get counts
-                entry_count = session.query(func.count(Entry.id)).scalar()
-                page_count = session.query(func.count(Page.id)).scalar()
-                tag_count = session.query(func.count(Tag.id)).scalar()
-                
-                # Get date range
-                first_entry = session.query(func.min(Entry.date)).scalar()
-                last_entry = session.query(func.max(Entry.date)).scalar()
-                
-                # Get most used tags
-                tags = session.query(
-                    Tag.name, func.count(Entry.id).label('count')
-                ).join(
-                    Tag.entries
-                ).group_by(
-                    Tag.name
-                ).order_by(
-                    func.count(Entry.id).desc()
-                ).limit(5).all()
-                
-                # Display statistics
-                print("\nJournal Statistics:")
-                print("=" * 50)
-                print(f"Total Entries: {entry_count}")
-                print(f"Total Pages: {page_count}")
-                print(f"Total Tags: {tag_count}")
-                
-                if first_entry and last_entry:
-                    print(f"Date Range: {first_entry.strftime('%Y-%m-%d')} to {last_entry.strftime('%Y-%m-%d')}")
+            stats = self.entry_manager.compute_stats(top_tags=5)
+            first_entry = stats['first_entry']
+            last_entry = stats['last_entry']
+            
+            # Display statistics
+            print("\nJournal Statistics:")
+            print("=" * 50)
+            print(f"Total Entries: {stats['entry_count']}")
+            print(f"Total Pages: {stats['page_count']}")
+            print(f"Total Tags: {stats['tag_count']}")
+            
+            if first_entry and last_entry:
+                print(f"Date Range: {first_entry.strftime('%Y-%m-%d')} to {last_entry.strftime('%Y-%m-%d')}")
+                
+            if stats['tags']:
+                print("\nMost Used Tags:")
+                for tag_name, count in stats['tags']:
+                    print(f"  {tag_name}: {count} entries")
                     
-                if tags:
-                    print("\nMost Used Tags:")
-                    for tag_name, count in tags:
-                        print(f"  {tag_name}: {count} entries")
-                        
-                print("=" * 50)
-                
-            finally:
-                session.close()
-                
+            print("=" * 50)
+            
         except Exception as e:
             print(f"Error getting statistics: {str(e)}")
             
@@ -535,16 +667,4 @@ class JournalCLI(cmd.Cmd):
             super().do_help(arg)
         else:
             # Show general help
-            print("\nDigital Journal Application")
-            print("\nAvailable commands:")
-            print("  new                 - Create a new journal entry")
-            print("  add_page            - Add a page to an entry")
-            print("  list [limit]        - List all journal entries")
-            print("  view <entry_id>     - View a specific entry")
-            print("  search <query>      - Search for entries")
-            print("  edit <entry_id>     - Edit an entry")
-            print("  export <entry_id>   - Export an entry (md or pdf)")
-            print("  delete <entry_id>   - Delete an entry")
-            print("  stats               - Show journal statistics")
-            print("  exit, quit          - Exit the application")
-            print("\nType 'help <command>' for more detailed information.")
\ No newline at end of file
+            self.stdout.write(self._HELP_TEXT)
\ No newline at end of file
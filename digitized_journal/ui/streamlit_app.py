@@ -1,12 +1,14 @@
 """Streamlit web interface for the journal application."""
 
 import os
+import base64
+import shutil
 import streamlit as st
 import tempfile
+import threading
 from pathlib import Path
 from datetime import datetime
-from typing import List, Optional, Tuple, Dict, Any
-import pandas as pd
+from typing import List, Optional, Tuple, Dict, Any, NamedTuple
 import io
 from PIL import Image
 import logging
@@ -14,11 +16,187 @@ import logging
 from digitized_journal.database.db_interface import DatabaseManager
 from digitized_journal.entries.entry_manager import EntryManager
 from digitized_journal.entries.exporter import EntryExporter
-from digitized_journal.utils.file_utils import save_uploaded_file, verify_image_file
+from digitized_journal.utils.file_utils import get_thumbnail, save_uploaded_file, verify_image_file
 from digitized_journal.config import DATA_DIR, IMAGES_DIR
 
 logger = logging.getLogger(__name__)
 
+# Longest side of the thumbnails shown on entry cards and in the page view
+CARD_THUMBNAIL_SIZE = 200
+DETAIL_THUMBNAIL_SIZE = 800
+
+# Entry cards shown per page of the entries list
+ENTRIES_PER_PAGE = 12
+
+
+@st.cache_resource
+def get_db() -> DatabaseManager:
+    """Get the database manager shared by every session and rerun."""
+    db_manager = DatabaseManager()
+    db_manager.initialize_database()
+    return db_manager
+
+
+@st.cache_resource
+def get_entry_manager() -> EntryManager:
+    """Get the entry manager shared by every session and rerun."""
+    return EntryManager(db_manager=get_db())
+
+
+@st.cache_resource
+def get_exporter() -> EntryExporter:
+    """Get the entry exporter shared by every session and rerun."""
+    return EntryExporter()
+
+
+class DbVersion:
+    """Counter of database writes made through the app, shared by every session."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = 0
+        
+    @property
+    def value(self) -> int:
+        """Current version, used to key cached query results."""
+        return self._value
+        
+    def bump(self):
+        """Record a write, so every session's cached results go stale."""
+        with self._lock:
+            self._value += 1
+
+
+@st.cache_resource
+def get_db_version() -> DbVersion:
+    """Get the database version counter shared by every session and rerun."""
+    return DbVersion()
+
+
+class EntrySummary(NamedTuple):
+    """Plain copy of the entry fields shown on a card, cheap to cache."""
+    
+    id: int
+    title: Optional[str]
+    date: datetime
+    mood: Optional[str]
+    tag_list: Optional[str]
+    page_count: int
+    cover_path: Optional[str]
+
+
+class TagSummary(NamedTuple):
+    """Plain copy of a tag for filter widgets."""
+    
+    id: int
+    name: str
+
+
+@st.cache_data(ttl=60)
+def _cached_entries_page(_entry_manager: EntryManager, db_version: int, 
+                         offset: int, limit: int) -> List[EntrySummary]:
+    """
+    Get summaries of one page of entries, cached across reruns.
+    
+    Args:
+        _entry_manager: Entry manager to load from (not part of the cache key)
+        db_version: Process-wide database version; bumping it invalidates the cache
+        offset: Number of entries to skip
+        limit: Maximum number of entries to return
+        
+    Returns:
+        List of entry summaries, newest first
+    """
+    return [EntrySummary(*row) for row in _entry_manager.get_entry_summaries(offset, limit)]
+
+
+@st.cache_data(ttl=60)
+def _cached_entry_count(_entry_manager: EntryManager, db_version: int) -> int:
+    """Get the total number of entries, cached across reruns."""
+    return _entry_manager.count_entries()
+
+
+@st.cache_data(ttl=60)
+def _cached_all_tags(_db_manager: DatabaseManager, db_version: int) -> List[TagSummary]:
+    """
+    Get all tags ordered by name, cached across reruns.
+    
+    Args:
+        _db_manager: Database manager to load from (not part of the cache key)
+        db_version: Process-wide database version; bumping it invalidates the cache
+        
+    Returns:
+        List of tag summaries
+    """
+    return [TagSummary(id=tag.id, name=tag.name) for tag in _db_manager.get_all_tags()]
+
+
+@st.cache_resource(max_entries=8)
+def _upload_preview(_uploaded_file, file_id: str) -> Image.Image:
+    """
+    Decode a preview of an uploaded image once, reused across reruns.
+    
+    Args:
+        _uploaded_file: Uploaded file to read (not part of the cache key)
+        file_id: Streamlit's ID for the upload, which keys the cache
+        
+    Returns:
+        Preview image no larger than 300 px
+    """
+    # Let JPEG decode at a reduced scale instead of full resolution
+    _uploaded_file.seek(0)
+    with Image.open(_uploaded_file) as image:
+        image.draft('RGB', (300, 300))
+        image.thumbnail((300, 300))
+        preview = image.copy()
+    _uploaded_file.seek(0)
+    return preview
+
+
+@st.cache_resource(max_entries=256, ttl=30)
+def _thumbnail_bytes(image_path: str, size: int, db_version: int) -> Optional[bytes]:
+    """
+    Get the encoded thumbnail of an image, generating it on first use.
+    
+    Cached by image path and database version, so showing an image again
+    on later reruns needs no stat of the image or its thumbnail.
+    
+    Args:
+        image_path: Path to the image file
+        size: Longest side of the thumbnail
+        db_version: Process-wide database version; bumping it invalidates the cache
+        
+    Returns:
+        Thumbnail file contents, or None if the image file doesn't exist
+    """
+    if not os.path.exists(image_path):
+        return None
+    with open(get_thumbnail(image_path, size), 'rb') as f:
+        return f.read()
+
+
+def _lazy_image_html(image_data: bytes, width: int) -> str:
+    """Build an img tag the browser only decodes once it scrolls into view."""
+    encoded = base64.b64encode(image_data).decode('ascii')
+    return (f'<img src="data:image/webp;base64,{encoded}" width="{width}" '
+            f'loading="lazy" decoding="async">')
+
+
+@st.cache_data(ttl=300)
+def _compute_stats(_entry_manager: EntryManager, db_version: int) -> Dict[str, Any]:
+    """
+    Get journal statistics, cached across reruns.
+    
+    Args:
+        _entry_manager: Entry manager to query (not part of the cache key)
+        db_version: Process-wide database version; bumping it invalidates the cache
+        
+    Returns:
+        Dictionary of counts, the date range, the top tags and entries per month
+    """
+    return _entry_manager.compute_stats(top_tags=10)
+
+
 class StreamlitApp:
     """Streamlit web interface for the journal application."""
     
@@ -32,43 +210,73 @@ class StreamlitApp:
             initial_sidebar_state="expanded"
         )
         
-        # Initialize components
-        self.db_manager = DatabaseManager()
-        self.db_manager.initialize_database()
-        self.entry_manager = EntryManager(db_manager=self.db_manager)
-        self.exporter = EntryExporter()
-        
-        # Set up session state
-        if 'current_view' not in st.session_state:
-            st.session_state.current_view = 'list'
-        if 'current_entry_id' not in st.session_state:
-            st.session_state.current_entry_id = None
+        # Shared components; the engine and its pool outlive each rerun
+        self.db_manager = get_db()
+        self.entry_manager = get_entry_manager()
+        self.exporter = get_exporter()
+        self.db_version = get_db_version()
+        
+        # Set up session state; the current view and entry live in the URL
         if 'search_query' not in st.session_state:
             st.session_state.search_query = ""
         if 'search_tag' not in st.session_state:
             st.session_state.search_tag = ""
+        if 'list_page' not in st.session_state:
+            st.session_state.list_page = 0
+            
+    def _invalidate_cache(self):
+        """Mark cached query results as stale after the database changes."""
+        self.db_version.bump()
+        
+    @staticmethod
+    def _navigate(view: str, entry_id: Optional[int] = None):
+        """Point the URL at a view.
+        
+        Used as a widget callback, so the rerun the click already triggers
+        renders the new view without an extra st.rerun().
+        
+        Args:
+            view: Name of the view to show
+            entry_id: Entry the view is about, if any
+        """
+        st.query_params.clear()
+        st.query_params["view"] = view
+        if entry_id is not None:
+            st.query_params["id"] = str(entry_id)
+            
+    @staticmethod
+    def _current_entry_id() -> Optional[int]:
+        """Get the entry ID from the URL, or None if missing or malformed."""
+        value = st.query_params.get("id", "")
+        return int(value) if value.isdecimal() else None
             
     def run(self):
         """Run the Streamlit app."""
         # Display header
         st.title("Digital Journal")
         
-        # Sidebar navigation
-        self._show_sidebar()
-        
-        # Main content based on current view
-        if st.session_state.current_view == 'list':
-            self._show_entries_list()
-        elif st.session_state.current_view == 'view':
-            self._show_entry_detail()
-        elif st.session_state.current_view == 'new':
-            self._show_new_entry_form()
-        elif st.session_state.current_view == 'edit':
-            self._show_edit_entry_form()
-        elif st.session_state.current_view == 'search':
-            self._show_search_view()
-        elif st.session_state.current_view == 'stats':
-            self._show_stats_view()
+        try:
+            # Sidebar navigation
+            self._show_sidebar()
+            
+            # Main content based on the view named in the URL
+            view = st.query_params.get("view", "list")
+            
+            if view == 'list':
+                self._show_entries_list()
+            elif view == 'view':
+                self._show_entry_detail()
+            elif view == 'new':
+                self._show_new_entry_form()
+            elif view == 'edit':
+                self._show_edit_entry_form()
+            elif view == 'search':
+                self._show_search_view()
+            elif view == 'stats':
+                self._show_stats_view()
+        finally:
+            # Release the database session at the end of each script run
+            self.db_manager.close_sessions()
             
     def _show_sidebar(self):
         """Display the sidebar navigation."""
@@ -76,60 +284,84 @@ class StreamlitApp:
             st.header("Navigation")
             
             # Main navigation buttons
-            if st.button("📝 New Entry"):
-                st.session_state.current_view = 'new'
-                st.rerun()
-                
-            if st.button("📚 All Entries"):
-                st.session_state.current_view = 'list'
-                st.rerun()
-                
-            if st.button("🔍 Search"):
-                st.session_state.current_view = 'search'
-                st.rerun()
-                
-            if st.button("📊 Statistics"):
-                st.session_state.current_view = 'stats'
-                st.rerun()
+            st.button("📝 New Entry", on_click=self._navigate, args=('new',))
+            st.button("📚 All Entries", on_click=self._navigate, args=('list',))
+            st.button("🔍 Search", on_click=self._navigate, args=('search',))
+            st.button("📊 Statistics", on_click=self._navigate, args=('stats',))
                 
             # Tags for filtering
             st.subheader("Filter by Tag")
-            tags = self.db_manager.get_all_tags()
+            tags = _cached_all_tags(self.db_manager, self.db_version.value)
+            
+            # One widget regardless of how many tags there are
+            st.selectbox(
+                "Tag",
+                options=[""] + [tag.name for tag in tags],
+                key="sidebar_tag",
+                on_change=self._filter_by_sidebar_tag,
+                label_visibility="collapsed"
+            )
             
-            for tag in tags:
-                if st.button(f"#{tag.name}", key=f"tag_{tag.id}"):
-                    st.session_state.search_tag = tag.name
-                    st.session_state.current_view = 'search'
-                    st.rerun()
+    def _filter_by_sidebar_tag(self):
+        """Open the search view filtered by the tag picked in the sidebar."""
+        picked = st.session_state.sidebar_tag
+        if picked:
+            st.session_state.search_tag = picked
+            self._navigate('search')
+            
+        # Reset the picker so the same tag can be picked again later
+        st.session_state.sidebar_tag = ""
                     
     def _show_entries_list(self):
         """Display a list of all entries."""
         st.header("Journal Entries")
         
-        entries = self.entry_manager.get_all_entries()
+        total = _cached_entry_count(self.entry_manager, self.db_version.value)
         
-        if not entries:
+        if not total:
             st.info("No entries found. Create your first entry!")
             return
             
+        # Clamp the page in case entries were deleted since it was chosen
+        page_count = (total + ENTRIES_PER_PAGE - 1) // ENTRIES_PER_PAGE
+        page = min(st.session_state.list_page, page_count - 1)
+        
+        entries = _cached_entries_page(
+            self.entry_manager, self.db_version.value, 
+            page * ENTRIES_PER_PAGE, ENTRIES_PER_PAGE
+        )
+        
         # Create a column display
         for i in range(0, len(entries), 3):
-            cols = st.columns(3)
-            
-            for j in range(3):
-                idx = i + j
-                if idx < len(entries):
-                    entry = entries[idx]
-                    with cols[j]:
-                        self._display_entry_card(entry)
+            # zip stops at the last entry of a short final row
+            for col, entry in zip(st.columns(3), entries[i:i + 3]):
+                with col:
+                    self._display_entry_card(entry)
+                        
+        # Page navigation
+        if page_count > 1:
+            col1, col2, col3 = st.columns([1, 2, 1])
+            
+            with col1:
+                if st.button("Prev", disabled=page == 0):
+                    st.session_state.list_page = page - 1
+                    st.rerun()
+                    
+            with col2:
+                st.caption(f"Page {page + 1} of {page_count}")
+                
+            with col3:
+                if st.button("Next", disabled=page >= page_count - 1):
+                    st.session_state.list_page = page + 1
+                    st.rerun()
                         
-    def _display_entry_card(self, entry):
+    def _display_entry_card(self, entry: EntrySummary):
         """Display an entry card."""
         # Prepare data for display
         title = entry.title or "Untitled Entry"
         date_str = entry.date.strftime("%Y-%m-%d")
-        tags = ", ".join([tag.name for tag in entry.tags]) if entry.tags else "No tags"
-        page_count = len(entry.pages)
+        tags = entry.tag_list or "No tags"
+        page_count = entry.page_count
         mood = entry.mood or ""
         
         # Create card with border
@@ -143,12 +375,16 @@ class StreamlitApp:
                 st.write(f"Mood: {mood}")
                 
             # Display first page preview if available
-            if page_count > 0 and entry.pages[0].image_path:
+            if entry.cover_path:
                 try:
-                    img_path = Path(entry.pages[0].image_path)
-                    if img_path.exists():
-                        image = Image.open(img_path)
-                        st.image(image, width=200)
+                    thumbnail = _thumbnail_bytes(
+                        entry.cover_path, CARD_THUMBNAIL_SIZE, self.db_version.value
+                    )
+                    if thumbnail is not None:
+                        st.markdown(
+                            _lazy_image_html(thumbnail, 200),
+                            unsafe_allow_html=True
+                        )
                 except Exception as e:
                     st.error(f"Error displaying image: {str(e)}")
                     
@@ -159,33 +395,30 @@ class StreamlitApp:
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                if st.button("View", key=f"view_{entry.id}"):
-                    st.session_state.current_entry_id = entry.id
-                    st.session_state.current_view = 'view'
-                    st.rerun()
+                st.button("View", key=f"view_{entry.id}", 
+                          on_click=self._navigate, args=('view', entry.id))
                     
             with col2:
-                if st.button("Edit", key=f"edit_{entry.id}"):
-                    st.session_state.current_entry_id = entry.id
-                    st.session_state.current_view = 'edit'
-                    st.rerun()
+                st.button("Edit", key=f"edit_{entry.id}", 
+                          on_click=self._navigate, args=('edit', entry.id))
                     
             with col3:
                 if st.button("Delete", key=f"delete_{entry.id}"):
-                    if self._delete_entry(entry.id):
+                    if self._delete_entry(entry):
                         st.rerun()
                         
     def _show_entry_detail(self):
         """Display the details of a single entry."""
-        if not st.session_state.current_entry_id:
+        entry_id = self._current_entry_id()
+        if not entry_id:
             st.error("No entry selected")
             return
             
-        entry = self.entry_manager.get_entry_with_pages(st.session_state.current_entry_id)
+        entry = self.entry_manager.get_entry_with_pages(entry_id)
         
         if not entry:
             st.error("Entry not found")
-            st.session_state.current_view = 'list'
+            self._navigate('list')
             st.rerun()
             return
             
@@ -209,9 +442,7 @@ class StreamlitApp:
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            if st.button("Edit Entry"):
-                st.session_state.current_view = 'edit'
-                st.rerun()
+            st.button("Edit Entry", on_click=self._navigate, args=('edit', entry.id))
                 
         with col2:
             if st.button("Export as Markdown"):
@@ -221,16 +452,22 @@ class StreamlitApp:
             if st.button("Export as PDF"):
                 self._export_entry(entry, 'pdf')
                 
-        # Pages content with tabs
+        # Pages content, one page at a time
         if entry.pages:
             st.subheader("Pages")
             
-            # Create tabs for each page
-            tabs = st.tabs([f"Page {page.page_number}" for page in entry.pages])
+            # Unlike st.tabs, which runs every tab's body on each rerun,
+            # only the chosen page's image and widgets are rendered
+            page_labels = [f"Page {page.page_number}" for page in entry.pages]
+            chosen = st.radio(
+                "Page", 
+                page_labels, 
+                horizontal=True, 
+                key=f"page_select_{entry.id}",
+                label_visibility="collapsed"
+            )
             
-            for i, page in enumerate(entry.pages):
-                with tabs[i]:
-                    self._display_page_detail(page, entry.id)
+            self._display_page_detail(entry.pages[page_labels.index(chosen)], entry.id)
         else:
             st.info("This entry has no pages yet.")
             
@@ -245,10 +482,11 @@ class StreamlitApp:
         with col1:
             # Display image
             try:
-                img_path = Path(page.image_path)
-                if img_path.exists():
-                    image = Image.open(img_path)
-                    st.image(image, use_column_width=True)
+                thumbnail = _thumbnail_bytes(
+                    page.image_path, DETAIL_THUMBNAIL_SIZE, self.db_version.value
+                )
+                if thumbnail is not None:
+                    st.image(thumbnail, use_column_width=True)
                 else:
                     st.error("Image file not found.")
             except Exception as e:
@@ -271,6 +509,7 @@ class StreamlitApp:
             if new_text != current_text:
                 if st.button("Save Text Changes", key=f"save_text_{page.id}"):
                     if self.entry_manager.update_page_text(page.id, new_text):
+                        self._invalidate_cache()
                         st.success("Text updated successfully.")
                         st.rerun()
                     else:
@@ -279,6 +518,7 @@ class StreamlitApp:
         # Delete page button
         if st.button("Delete Page", key=f"delete_page_{page.id}"):
             if self._delete_page(page.id):
+                self._invalidate_cache()
                 st.success("Page deleted successfully.")
                 st.rerun()
             else:
@@ -293,9 +533,8 @@ class StreamlitApp:
         )
         
         if uploaded_file:
-            # Preview the uploaded image
-            image = Image.open(uploaded_file)
-            st.image(image, width=300, caption="Preview")
+            # Preview the uploaded image, decoded once per upload
+            st.image(_upload_preview(uploaded_file, uploaded_file.file_id), caption="Preview")
             
             col1, col2 = st.columns(2)
             with col1:
@@ -304,9 +543,10 @@ class StreamlitApp:
             if st.button("Add Page"):
                 with st.spinner("Processing image..."):
                     try:
-                        # Save the uploaded file
+                        # Save the uploaded file in chunks; the preview moved the read position
+                        uploaded_file.seek(0)
                         with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-                            tmp.write(uploaded_file.getvalue())
+                            shutil.copyfileobj(uploaded_file, tmp, 65536)
                             tmp_path = tmp.name
                             
                         # Add the page
@@ -318,6 +558,12 @@ class StreamlitApp:
                         
                         # Clean up
                         os.unlink(tmp_path)
+                        self._invalidate_cache()
+                        
+                        # Generate the thumbnails now so the views don't wait on them
+                        page = self.db_manager.get_page(page_id)
+                        for size in (CARD_THUMBNAIL_SIZE, DETAIL_THUMBNAIL_SIZE):
+                            get_thumbnail(page.image_path, size)
                         
                         st.success("Page added successfully!")
                         st.rerun()
@@ -357,11 +603,11 @@ class StreamlitApp:
                         tags=tag_list
                     )
                     
+                    self._invalidate_cache()
                     st.success("Entry created successfully!")
                     
-                    # Update state and redirect to edit the new entry
-                    st.session_state.current_entry_id = entry_id
-                    st.session_state.current_view = 'view'
+                    # Redirect to view the new entry
+                    self._navigate('view', entry_id)
                     st.rerun()
                     
                 except Exception as e:
@@ -369,15 +615,16 @@ class StreamlitApp:
                     
     def _show_edit_entry_form(self):
         """Display a form to edit an existing entry."""
-        if not st.session_state.current_entry_id:
+        entry_id = self._current_entry_id()
+        if not entry_id:
             st.error("No entry selected")
             return
             
-        entry = self.entry_manager.get_entry_with_pages(st.session_state.current_entry_id)
+        entry = self.entry_manager.get_entry_with_pages(entry_id)
         
         if not entry:
             st.error("Entry not found")
-            st.session_state.current_view = 'list'
+            self._navigate('list')
             st.rerun()
             return
             
@@ -420,8 +667,9 @@ class StreamlitApp:
                     )
                     
                     if success:
+                        self._invalidate_cache()
                         st.success("Entry updated successfully!")
-                        st.session_state.current_view = 'view'
+                        self._navigate('view', entry.id)
                         st.rerun()
                     else:
                         st.error("Failed to update entry.")
@@ -430,68 +678,68 @@ class StreamlitApp:
                     st.error(f"Error updating entry: {str(e)}")
                     
         # Provide option to go back to viewing
-        if st.button("Cancel"):
-            st.session_state.current_view = 'view'
-            st.rerun()
+        st.button("Cancel", on_click=self._navigate, args=('view', entry.id))
             
     def _show_search_view(self):
         """Display the search interface."""
         st.header("Search Journal Entries")
         
-        # Search form
-        col1, col2, col3 = st.columns([3, 2, 1])
-        
-        with col1:
-            query = st.text_input(
-                "Search text", 
-                value=st.session_state.search_query
-            )
+        # Search form; typing doesn't rerun the script until it is submitted
+        with st.form("search_form"):
+            col1, col2, col3 = st.columns([3, 2, 1])
             
-        with col2:
-            # Get all tags for dropdown
-            tags = self.db_manager.get_all_tags()
-            tag_options = [""] + [tag.name for tag in tags]
-            
-            selected_tag = st.selectbox(
-                "Filter by tag",
-                options=tag_options,
-                index=tag_options.index(st.session_state.search_tag) if st.session_state.search_tag in tag_options else 0
-            )
-            
-        with col3:
-            st.write("")  # Spacing
-            search_clicked = st.button("Search")
+            with col1:
+                query = st.text_input(
+                    "Search text", 
+                    value=st.session_state.search_query
+                )
+                
+            with col2:
+                # Get all tags for dropdown
+                tags = _cached_all_tags(self.db_manager, self.db_version.value)
+                tag_options = [""] + [tag.name for tag in tags]
+                
+                selected_tag = st.selectbox(
+                    "Filter by tag",
+                    options=tag_options,
+                    index=tag_options.index(st.session_state.search_tag) if st.session_state.search_tag in tag_options else 0
+                )
+                
+            with col3:
+                st.write("")  # Spacing
+                submitted = st.form_submit_button("Search")
+                
+        # Only a submitted search replaces the stored one; a sidebar tag
+        # click sets search_tag directly
+        if submitted:
+            st.session_state.search_query = query
+            st.session_state.search_tag = selected_tag
             
-        # Update session state
-        st.session_state.search_query = query
-        st.session_state.search_tag = selected_tag
+        query = st.session_state.search_query
+        selected_tag = st.session_state.search_tag
         
         # Execute search
-        if search_clicked or query or selected_tag:
+        if submitted or query or selected_tag:
             with st.spinner("Searching..."):
-                entries = self.entry_manager.search_entries(
+                # Matching and snippets both come from the FTS index in SQL
+                results = self.entry_manager.search_entries_with_snippets(
                     query=query if query else None,
                     tag=selected_tag if selected_tag else None
                 )
                 
             # Display results
-            if entries:
-                st.subheader(f"Found {len(entries)} results")
+            if results:
+                st.subheader(f"Found {len(results)} results")
                 
                 # Create a column display
-                for i in range(0, len(entries), 2):
-                    cols = st.columns(2)
-                    
-                    for j in range(2):
-                        idx = i + j
-                        if idx < len(entries):
-                            entry = entries[idx]
-                            with cols[j]:
-                                self._display_search_result(entry, query)
+                for i in range(0, len(results), 2):
+                    for col, (entry, page_number, snippet) in zip(st.columns(2), results[i:i + 2]):
+                        with col:
+                            self._display_search_result(entry, page_number, snippet)
             else:
                 st.info("No matching entries found.")
                 
-    def _display_search_result(self, entry, query):
+    def _display_search_result(self, entry, page_number: Optional[int], snippet: Optional[str]):
         """Display a search result card."""
         # Prepare data for display
         title = entry.title or "Untitled Entry"
@@ -507,163 +755,105 @@ class StreamlitApp:
             # Tags
             st.write(f"Tags: {tags}")
             
-            # Text snippet if query exists
-            if query:
-                for page in entry.pages:
-                    if page.text_content and query.lower() in page.text_content.lower():
-                        snippet = self._get_text_snippet(page.text_content, query)
-                        st.text_area(
-                            f"Page {page.page_number}",
-                            value=f"...{snippet}...",
-                            height=100,
-                            disabled=True,
-                            key=f"snippet_{entry.id}_{page.page_number}"
-                        )
-                        break
-                        
+            # Text snippet of the first matching page
+            if snippet:
+                st.text_area(
+                    f"Page {page_number}",
+                    value=f"...{snippet}...",
+                    height=100,
+                    disabled=True,
+                    key=f"snippet_{entry.id}_{page_number}"
+                )
+                
+
             # View button
-            if st.button("View Entry", key=f"view_search_{entry.id}"):
-                st.session_state.current_entry_id = entry.id
-                st.session_state.current_view = 'view'
-                st.rerun()
+            st.button("View Entry", key=f"view_search_{entry.id}", 
+                      on_click=self._navigate, args=('view', entry.id))
                 
-    def _get_text_snippet(self, text: str, query: str, context_chars: int = 100) -> str:
-        """Extract a snippet of text around the query term."""
-        query_lower = query.lower()
-        text_lower = text.lower()
-        
-        pos = text_lower.find(query_lower)
-        if pos == -1:
-            return text[:200]  # Fallback if query not found
-            
-        start = max(0, pos - context_chars)
-        end = min(len(text), pos + len(query) + context_chars)
-        
-        return text[start:end]
-        
     def _show_stats_view(self):
         """Display journal statistics."""
         st.header("Journal Statistics")
         
         try:
-            session = self.db_manager.get_session()
+            stats = _compute_stats(self.entry_manager, self.db_version.value)
+            entry_count = stats['entry_count']
+            page_count = stats['page_count']
+            tag_count = stats['tag_count']
+            first_entry = stats['first_entry']
+            last_entry = stats['last_entry']
+            tags = stats['tags']
+            entries_by_month = stats['entries_by_month']
+            
+            # Display basic stats in columns
+            col1, col2, col3, col4 = st.columns(4)
             
-            try:
-                from ..database.models import Entry, Page, Tag
-                from sqlalchemy import func
-                
-                # Get counts
-                entry_count = session.query(func.count(Entry.id)).scalar()
-                page_count = session.query(func.count(Page.id)).scalar()
-                tag_count = session.query(func.count(Tag.id)).scalar()
-                
-                # Get date range
-                first_entry = session.query(func.min(Entry.date)).scalar()
-                last_entry = session.query(func.max(Entry.date)).scalar()
-                
-                # Get most used tags
-                tags = session.query(
-                    Tag.name, func.count(Entry.id).label('count')
-                ).join(
-                    Tag.entries
-                ).group_by(
-                    Tag.name
-                ).order_by(
-                    func.count(Entry.id).desc()
-                ).limit(10).all()
-                
-                # Get entries per month
-                entries_by_month = session.query(
-                    func.strftime('%Y-%m', Entry.date).label('month'),
-                    func.count(Entry.id).label('count')
-                ).group_by(
-                    'month'
-                ).order_by(
-                    'month'
-                ).all()
+            with col1:
+                st.metric("Total Entries", entry_count)
+            
+            with col2:
+                st.metric("Total Pages", page_count)
                 
-                # Display basic stats in columns
-                col1, col2, col3, col4 = st.columns(4)
+            with col3:
+                st.metric("Total Tags", tag_count)
                 
-                with col1:
-                    st.metric("Total Entries", entry_count)
+            with col4:
+                if entry_count > 0:
+                    avg_pages = round(page_count / entry_count, 1)
+                    st.metric("Avg. Pages per Entry", avg_pages)
+                else:
+                    st.metric("Avg. Pages per Entry", 0)
+            
+            # Date range
+            if first_entry and last_entry:
+                st.subheader("Journal Timeline")
+                st.write(f"First entry: {first_entry.strftime('%Y-%m-%d')}")
+                st.write(f"Last entry: {last_entry.strftime('%Y-%m-%d')}")
                 
-                with col2:
-                    st.metric("Total Pages", page_count)
+            # Charts
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                # Top tags chart
+                if tags:
+                    st.subheader("Most Used Tags")
                     
-                with col3:
-                    st.metric("Total Tags", tag_count)
+                    # Column -> {index: value} mapping, indexed by tag name
+                    st.bar_chart({"Count": dict(tags)})
                     
-                with col4:
-                    if entry_count > 0:
-                        avg_pages = round(page_count / entry_count, 1)
-                        st.metric("Avg. Pages per Entry", avg_pages)
-                    else:
-                        st.metric("Avg. Pages per Entry", 0)
-                
-                # Date range
-                if first_entry and last_entry:
-                    st.subheader("Journal Timeline")
-                    st.write(f"First entry: {first_entry.strftime('%Y-%m-%d')}")
-                    st.write(f"Last entry: {last_entry.strftime('%Y-%m-%d')}")
+            with col2:
+                # Entries by month chart
+                if entries_by_month:
+                    st.subheader("Entries by Month")
+                    
+                    # Column -> {index: value} mapping, indexed by month
+                    st.line_chart({"Count": dict(entries_by_month)})
                     
-                # Charts
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # Top tags chart
-                    if tags:
-                        st.subheader("Most Used Tags")
-                        
-                        # Prepare data for chart
-                        tag_data = pd.DataFrame(tags, columns=["Tag", "Count"])
-                        st.bar_chart(tag_data.set_index("Tag"))
-                        
-                with col2:
-                    # Entries by month chart
-                    if entries_by_month:
-                        st.subheader("Entries by Month")
-                        
-                        # Prepare data for chart
-                        month_data = pd.DataFrame(entries_by_month, columns=["Month", "Count"])
-                        st.line_chart(month_data.set_index("Month"))
-                        
-            finally:
-                session.close()
-                
         except Exception as e:
             st.error(f"Error getting statistics: {str(e)}")
             
     def _export_entry(self, entry, format_type):
         """Export an entry and provide download link."""
         try:
+            # Exports are built in memory; nothing is written to the exports directory
             if format_type == 'md':
-                output_path = self.exporter.to_markdown(entry)
+                file_name, content = self.exporter.to_markdown_bytes(entry)
                 
-                # Read the file
-                with open(output_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    
                 # Offer download
                 st.download_button(
                     label="Download Markdown File",
                     data=content,
-                    file_name=output_path.name,
+                    file_name=file_name,
                     mime="text/markdown"
                 )
                 
             elif format_type == 'pdf':
-                output_path = self.exporter.to_pdf(entry)
+                file_name, content = self.exporter.to_pdf_bytes(entry)
                 
-                # Read the file
-                with open(output_path, 'rb') as f:
-                    content = f.read()
-                    
                 # Offer download
                 st.download_button(
                     label="Download PDF File",
                     data=content,
-                    file_name=output_path.name,
+                    file_name=file_name,
                     mime="application/pdf"
                 )
                 
@@ -672,15 +862,10 @@ class StreamlitApp:
         except Exception as e:
             st.error(f"Error exporting entry: {str(e)}")
             
-    def _delete_entry(self, entry_id):
-        """Delete an entry with confirmation."""
-        # Get entry to confirm
-        entry = self.entry_manager.get_entry_with_pages(entry_id)
+    def _delete_entry(self, entry: EntrySummary):
+        """Delete an entry with confirmation, using the card's already loaded fields."""
+        entry_id = entry.id
         
-        if not entry:
-            st.error(f"Entry with ID {entry_id} not found.")
-            return False
-            
         # Confirm deletion
         title = entry.title or "Untitled Entry"
         date_str = entry.date.strftime("%Y-%m-%d")
@@ -695,9 +880,10 @@ class StreamlitApp:
                 success = self.entry_manager.delete_entry(entry_id)
                 
                 if success:
+                    self._invalidate_cache()
                     st.success("Entry deleted successfully.")
-                    if st.session_state.current_entry_id == entry_id:
-                        st.session_state.current_entry_id = None
+                    if self._current_entry_id() == entry_id:
+                        self._navigate('list')
                     return True
                 else:
                     st.error("Failed to delete entry.")
@@ -710,43 +896,9 @@ class StreamlitApp:
         return False
         
     def _delete_page(self, page_id):
-        """Delete a page from the database."""
+        """Delete a page and its unused image file."""
         try:
-            session = self.db_manager.get_session()
-            
-            try:
-                from ..database.models import Page
-                
-                # Get page to delete
-                page = session.query(Page).filter_by(id=page_id).first()
-                
-                if not page:
-                    return False
-                    
-                # Remember image path for cleanup
-                image_path = page.image_path
-                
-                # Delete from database
-                session.delete(page)
-                session.commit()
-                
-                # Clean up image file
-                if image_path and os.path.exists(image_path):
-                    try:
-                        os.remove(image_path)
-                    except Exception as e:
-                        logger.error(f"Error deleting image file: {str(e)}")
-                        
-                return True
-                
-            except Exception as e:
-                session.rollback()
-                logger.error(f"Error deleting page: {str(e)}")
-                raise
-                
-            finally:
-                session.close()
-                
+            return self.entry_manager.delete_page(page_id)
         except Exception as e:
             logger.error(f"Error in delete_page: {str(e)}")
             return False
@@ -1,20 +1,61 @@
 """Utility functions for file operations."""
 
+import errno
 import os
+import stat
+import sys
 import shutil
+import hashlib
+import time
 import uuid
-from datetime import datetime
+from itertools import count
+from functools import lru_cache
 from pathlib import Path
 import logging
-from typing import List, Optional, Tuple, Union
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple, Union
 from PIL import Image
 
+from ..config import THUMBNAILS_DIR, USE_HARDLINKS
+
 logger = logging.getLogger(__name__)
 
+COPY_BUFFER_SIZE = 1 << 20
+
+# Copy buffers reused across uploads; list append/pop are atomic under the GIL
+_BUFFER_POOL: List[bytearray] = []
+_BUFFER_POOL_MAX = 4
+
+# Disambiguates filenames created within the same clock tick
+_filename_counter = count()
+
+@lru_cache(maxsize=1024)
+def ensure_dir(path: Union[str, Path]) -> Path:
+    """
+    Create a directory if needed, remembering that it exists.
+    
+    Later calls for the same path return without touching the file system.
+    Call ensure_dir.cache_clear() after removing a directory that may be
+    passed in again.
+    
+    Args:
+        path: Directory path
+        
+    Returns:
+        The directory as a Path
+    """
+    directory = Path(path)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
 def create_unique_filename(original_path: Union[str, Path], prefix: Optional[str] = None) -> str:
     """
     Create a unique filename based on original file.
     
+    Names combine the current time in nanoseconds, the process ID and a
+    per-process counter, so no timestamp string is formatted and the OS
+    random source is not read for every file. The 'secure' prefix gets a
+    random, unguessable UUID-based name instead.
+    
     Args:
         original_path: Original file path
         prefix: Optional prefix to add
@@ -22,63 +63,240 @@ def create_unique_filename(original_path: Union[str, Path], prefix: Optional[str
     Returns:
         Unique filename with extension
     """
-    path = Path(original_path)
+    suffix = os.path.splitext(original_path)[1]
     base = prefix + "_" if prefix else ""
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    unique_id = str(uuid.uuid4())[:8]
     
-    return f"{base}{timestamp}_{unique_id}{path.suffix}"
+    if prefix == 'secure':
+        return f"{base}{uuid.uuid4().hex}{suffix}"
+        
+    return f"{base}{time.time_ns():x}_{os.getpid():x}_{next(_filename_counter):x}{suffix}"
+
+class SavedImage(NamedTuple):
+    """A saved image file together with its dimensions."""
+    path: Path
+    width: int
+    height: int
 
-def verify_image_file(image_path: Union[str, Path]) -> bool:
+def _probe_image(image_path: Union[str, Path], 
+                 st: Optional[os.stat_result] = None) -> Tuple[bool, Optional[Tuple[int, int]]]:
     """
-    Verify that a file is a valid image.
+    Verify an image and read its dimensions with a single open.
     
     Args:
         image_path: Path to the image file
+        st: Result of os.stat for the file, if the caller already has it
         
     Returns:
-        True if valid image, False otherwise
+        Tuple of (is valid, (width, height) or None if invalid)
     """
+    if st is None:
+        try:
+            st = os.stat(image_path)
+        except OSError as e:
+            logger.warning(f"Invalid image file: {image_path}, error: {str(e)}")
+            return False, None
+            
+    # Directories and empty files are rejected without opening them
+    if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+        logger.warning(f"Invalid image file: {image_path}, not a non-empty regular file")
+        return False, None
+        
+    return _probe_image_contents(str(image_path), st.st_mtime_ns, st.st_size)
+
+@lru_cache(maxsize=256)
+def _probe_image_contents(image_path: str, mtime_ns: int, 
+                          size: int) -> Tuple[bool, Optional[Tuple[int, int]]]:
+    """Open and verify an image file; the mtime and size only key the cache."""
     try:
         with Image.open(image_path) as img:
+            # The size is read from the header, before verify() consumes the file
+            dimensions = img.size
             img.verify()  # Verify image file
-        return True
+        return True, dimensions
     except Exception as e:
         logger.warning(f"Invalid image file: {image_path}, error: {str(e)}")
-        return False
+        return False, None
+
+# Leading bytes of JPEG, PNG, GIF, BMP and little/big-endian TIFF files
+_IMAGE_MAGIC = (b'\xff\xd8\xff', b'\x89PNG\r\n\x1a\n', b'GIF8', b'BM', b'II*\x00', b'MM\x00*')
+
+def _sniff_image(image_path: Union[str, Path]) -> Optional[Tuple[int, int]]:
+    """
+    Cheaply check a file we just wrote ourselves and read its dimensions.
+    
+    Only the magic number and the header are read; unlike _probe_image the
+    image data is not walked by verify().
+    
+    Args:
+        image_path: Path to the image file
+        
+    Returns:
+        Tuple of (width, height), or None if the file is not a known image type
+    """
+    with open(image_path, 'rb') as f:
+        if not f.read(8).startswith(_IMAGE_MAGIC):
+            return None
+            
+        f.seek(0)
+        try:
+            with Image.open(f) as img:
+                return img.size
+        except Exception as e:
+            logger.warning(f"Invalid image file: {image_path}, error: {str(e)}")
+            return None
+
+def verify_image_file(image_path: Union[str, Path], st: Optional[os.stat_result] = None) -> bool:
+    """
+    Verify that a file is a valid image.
+    
+    Results are cached by path, modification time and size, so checking the
+    same unchanged file again costs a single stat.
+    
+    Args:
+        image_path: Path to the image file
+        st: Result of os.stat for the file, if the caller already has it
+        
+    Returns:
+        True if valid image, False otherwise
+    """
+    return _probe_image(image_path, st)[0]
 
 def get_image_dimensions(image_path: Union[str, Path]) -> Tuple[int, int]:
     """
     Get image dimensions.
     
+    Shares its cached probe with verify_image_file, so a file that was
+    already verified is not opened again.
+    
     Args:
         image_path: Path to the image file
         
     Returns:
         Tuple of (width, height)
+        
+    Raises:
+        ValueError: If the file is not a valid image
+    """
+    ok, dimensions = _probe_image(image_path)
+    if not ok:
+        logger.error(f"Error getting image dimensions: invalid image file {image_path}")
+        raise ValueError(f"Invalid image file: {image_path}")
+        
+    return dimensions
+
+def get_thumbnail(image_path: Union[str, Path], size: int, 
+                  thumbs_dir: Union[str, Path] = THUMBNAILS_DIR) -> Path:
     """
+    Get a WebP thumbnail of an image, creating it if missing or out of date.
+    
+    Thumbnails are named after the image's file name stem, which for stored
+    pages is the hash of the image contents.
+    
+    Args:
+        image_path: Path to the image file
+        size: Maximum width and height of the thumbnail in pixels
+        thumbs_dir: Directory holding the thumbnails
+        
+    Returns:
+        Path to the thumbnail file
+    """
+    image_path = Path(image_path)
+    thumb_path = Path(thumbs_dir) / f"{image_path.stem}_{size}.webp"
+    
     try:
-        with Image.open(image_path) as img:
-            return img.size
-    except Exception as e:
-        logger.error(f"Error getting image dimensions: {str(e)}")
-        raise
+        if thumb_path.stat().st_mtime >= image_path.stat().st_mtime:
+            return thumb_path
+    except FileNotFoundError:
+        pass
+        
+    with Image.open(image_path) as img:
+        # Let JPEG decode at a reduced scale close to the thumbnail size
+        img.draft('RGB', (size, size))
+        img.thumbnail((size, size))
+        if img.mode not in ('RGB', 'RGBA', 'L'):
+            img = img.convert('RGB')
+            
+        # Write to a temporary name so readers never see a partial file
+        ensure_dir(str(thumb_path.parent))
+        temp_path = thumb_path.with_suffix('.tmp')
+        img.save(temp_path, 'WEBP', quality=80)
+        
+    os.replace(temp_path, thumb_path)
+    return thumb_path
 
-def save_uploaded_file(uploaded_file: bytes, target_dir: Union[str, Path], 
-                      filename: Optional[str] = None) -> Path:
+def remove_thumbnails(image_path: Union[str, Path], 
+                      thumbs_dir: Union[str, Path] = THUMBNAILS_DIR) -> None:
+    """
+    Remove every thumbnail size made for an image by get_thumbnail.
+    
+    Another stored copy of the same image shares its thumbnails; they are
+    recreated the next time get_thumbnail is asked for them.
+    
+    Args:
+        image_path: Path to the image file
+        thumbs_dir: Directory holding the thumbnails
+    """
+    for thumb_path in Path(thumbs_dir).glob(f"{Path(image_path).stem}_*.webp"):
+        try:
+            thumb_path.unlink()
+        except OSError as e:
+            logger.error(f"Error deleting thumbnail: {str(e)}")
+
+def _get_buffer() -> bytearray:
+    """Take a copy buffer from the pool, allocating one if it is empty."""
+    try:
+        return _BUFFER_POOL.pop()
+    except IndexError:
+        return bytearray(COPY_BUFFER_SIZE)
+
+def _put_buffer(buf: bytearray):
+    """Return a copy buffer to the pool."""
+    if len(_BUFFER_POOL) < _BUFFER_POOL_MAX:
+        _BUFFER_POOL.append(buf)
+
+def _copy_stream(src: BinaryIO, dst: BinaryIO):
+    """
+    Copy a binary stream in blocks through a pooled buffer.
+    
+    Args:
+        src: Readable binary file-like object
+        dst: Writable binary file-like object
+    """
+    if not hasattr(src, 'readinto'):
+        shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+        return
+        
+    buf = _get_buffer()
+    try:
+        with memoryview(buf) as view:
+            while True:
+                n = src.readinto(buf)
+                if not n:
+                    break
+                dst.write(view[:n])
+    finally:
+        _put_buffer(buf)
+
+def save_uploaded_file(uploaded_file: Union[bytes, BinaryIO], target_dir: Union[str, Path], 
+                      filename: Optional[str] = None) -> SavedImage:
     """
     Save an uploaded file to the target directory.
     
+    File-like uploads (such as Streamlit's UploadedFile) are streamed to
+    disk in blocks rather than first being read into one bytes object.
+    The saved file is only checked by its magic number and header; use
+    verify_image_file or list_image_files_verified for full verification
+    of files from elsewhere.
+    
     Args:
-        uploaded_file: Uploaded file data as bytes
+        uploaded_file: Uploaded file data as bytes or a binary file-like object
         target_dir: Directory to save the file
         filename: Optional custom filename (generated if None)
         
     Returns:
-        Path to the saved file
+        The saved file's path and image dimensions
     """
-    target_dir = Path(target_dir)
-    os.makedirs(target_dir, exist_ok=True)
+    target_dir = ensure_dir(str(target_dir))
     
     if not filename:
         filename = create_unique_filename("temp.jpg", "upload")
@@ -87,14 +305,18 @@ def save_uploaded_file(uploaded_file: bytes, target_dir: Union[str, Path],
     
     try:
         with open(file_path, 'wb') as f:
-            f.write(uploaded_file)
+            if isinstance(uploaded_file, (bytes, bytearray, memoryview)):
+                f.write(uploaded_file)
+            else:
+                _copy_stream(uploaded_file, f)
         
-        # Verify it's a valid image after saving
-        if not verify_image_file(file_path):
+        # Check it's an image after saving, keeping its dimensions
+        dimensions = _sniff_image(file_path)
+        if dimensions is None:
             os.remove(file_path)
             raise ValueError("Invalid image file")
             
-        return file_path
+        return SavedImage(file_path, *dimensions)
         
     except Exception as e:
         logger.error(f"Error saving uploaded file: {str(e)}")
@@ -103,36 +325,178 @@ def save_uploaded_file(uploaded_file: bytes, target_dir: Union[str, Path],
             os.remove(file_path)
         raise
 
+IMAGE_EXTENSIONS = frozenset({'jpg', 'jpeg', 'png', 'gif', 'bmp', 'tiff'})
+
+# Suffixes for str.endswith, in the lower and upper case most files use
+_IMAGE_SUFFIXES = tuple(f".{ext}" for ext in sorted(IMAGE_EXTENSIONS)) + \
+    tuple(f".{ext.upper()}" for ext in sorted(IMAGE_EXTENSIONS))
+
+def _is_image_name(name: str) -> bool:
+    """Check a file name's extension without building a Path."""
+    if not name.endswith(_IMAGE_SUFFIXES):
+        # Only mixed-case names pay for lowercasing
+        name = name.lower()
+        if not name.endswith(_IMAGE_SUFFIXES):
+            return False
+            
+    # Names like ".png" have no stem, so no extension either
+    return name.rfind('.') > 0
+
+def iter_image_files(directory: Union[str, Path]) -> Iterator[Path]:
+    """
+    Iterate over the image files in a directory.
+    
+    Files are matched by extension only; their contents are checked when
+    they are actually opened, not while listing.
+    
+    Args:
+        directory: Directory to scan
+        
+    Yields:
+        Paths to image files
+    """
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                # is_file uses the file type readdir already returned
+                if _is_image_name(entry.name) and entry.is_file(follow_symlinks=False):
+                    yield Path(entry.path)
+    except FileNotFoundError:
+        return
+
 def list_image_files(directory: Union[str, Path]) -> List[Path]:
     """
     List all image files in a directory.
     
+    Files are matched by extension only; stored images were already
+    verified by save_uploaded_file. Use list_image_files_verified when
+    the directory may hold files from elsewhere.
+    
     Args:
         directory: Directory to scan
         
     Returns:
         List of paths to image files
     """
-    directory = Path(directory)
-    image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff'}
+    return list(iter_image_files(directory))
+
+def list_image_files_verified(directory: Union[str, Path]) -> List[Path]:
+    """
+    List the image files in a directory whose contents are valid images.
+    
+    Args:
+        directory: Directory to scan
+        
+    Returns:
+        List of paths to valid image files
+    """
+    return [path for path in iter_image_files(directory) if verify_image_file(path)]
+
+def fast_copy(src: Union[str, Path], dst: Union[str, Path]) -> Path:
+    """
+    Copy file contents using a kernel-side copy where the platform allows it.
     
-    image_files = []
+    On Linux the data never passes through user space: os.copy_file_range
+    is tried first (Python 3.8+; file systems like Btrfs and XFS can share
+    the blocks instead of copying them), then os.sendfile. Elsewhere this
+    falls back to shutil.copyfile. File metadata is not copied.
     
-    if not directory.exists():
-        return []
+    Args:
+        src: Source file path
+        dst: Destination file path
         
-    for item in directory.iterdir():
-        if item.is_file() and item.suffix.lower() in image_extensions:
-            if verify_image_file(item):
-                image_files.append(item)
-                
-    return image_files
+    Returns:
+        Path to the destination file
+        
+    Raises:
+        shutil.SameFileError: If src and dst are the same file
+    """
+    dst = Path(dst)
+    
+    if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+        # Opening dst for writing would truncate src
+        if dst.exists() and os.path.samefile(src, dst):
+            raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+            
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            remaining = os.fstat(fsrc.fileno()).st_size
+            offset = 0
+            use_copy_range = hasattr(os, 'copy_file_range')
+            while remaining > 0:
+                if use_copy_range:
+                    try:
+                        # Advances both file positions, which sendfile then continues from
+                        sent = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    except OSError as e:
+                        # Cross-device before Linux 5.3, or unsupported by the file system
+                        if e.errno not in (errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP):
+                            raise
+                        use_copy_range = False
+                        continue
+                else:
+                    sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, remaining)
+                if sent == 0:
+                    break
+                offset += sent
+                remaining -= sent
+        return dst
+        
+    shutil.copyfile(src, dst)
+    return dst
+
+def copy_and_hash(src: Union[str, Path], dst: Union[str, Path], 
+                  chunk_size: int = 1 << 20) -> str:
+    """
+    Copy a file while computing the SHA-256 digest of its contents.
+    
+    The source is read once, with each block both hashed and written.
+    
+    Args:
+        src: Source file path
+        dst: Destination file path
+        chunk_size: Number of bytes read per block
+        
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        for block in iter(lambda: fsrc.read(chunk_size), b''):
+            digest.update(block)
+            fdst.write(block)
+            
+    return digest.hexdigest()
+
+def hash_file(file_path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    """
+    Compute the SHA-256 digest of a file's contents.
+    
+    Args:
+        file_path: Path to the file
+        chunk_size: Number of bytes read per block
+        
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+            
+    return digest.hexdigest()
 
 def copy_file_to_dir(file_path: Union[str, Path], target_dir: Union[str, Path], 
                    new_filename: Optional[str] = None) -> Path:
     """
     Copy a file to a target directory.
     
+    With USE_HARDLINKS set, the target is hard-linked to the source when
+    both are on the same file system, so no data is copied. Otherwise, or
+    if linking fails, the file is copied in-kernel with fast_copy and its
+    metadata is copied as shutil.copy2 would.
+    
     Args:
         file_path: Source file path
         target_dir: Target directory
@@ -142,17 +506,35 @@ def copy_file_to_dir(file_path: Union[str, Path], target_dir: Union[str, Path],
         Path to the copied file
     """
     file_path = Path(file_path)
-    target_dir = Path(target_dir)
-    
-    os.makedirs(target_dir, exist_ok=True)
+    target_dir = ensure_dir(str(target_dir))
     
     if not new_filename:
         new_filename = file_path.name
         
     target_path = target_dir / new_filename
     
+    if USE_HARDLINKS:
+        # Already linked by an earlier call
+        if target_path.exists() and os.path.samefile(file_path, target_path):
+            return target_path
+            
+        # Link under a temporary name and rename it over the target, so an
+        # existing target (possibly a link to other data) is replaced, not written into
+        temp_path = target_dir / f".{uuid.uuid4().hex}.tmp"
+        try:
+            os.link(file_path, temp_path)
+            os.replace(temp_path, target_path)
+            return target_path
+        except OSError as e:
+            # Cross-device or unsupported by the file system
+            logger.debug(f"Hard link failed, copying instead: {str(e)}")
+            if temp_path.exists():
+                os.remove(temp_path)
+            
     try:
-        return Path(shutil.copy2(file_path, target_path))
+        fast_copy(file_path, target_path)
+        shutil.copystat(file_path, target_path)
+        return target_path
     except Exception as e:
         logger.error(f"Error copying file: {str(e)}")
         raise
\ No newline at end of file
@@ -2,7 +2,6 @@ import os
 import sys
 import streamlit as st
 from pathlib import Path
-import tempfile
 from PIL import Image
 import cv2
 import numpy as np
@@ -15,11 +14,60 @@ sys.path.append(project_root)
 # Import OCR components
 from digitized_journal.ocr.preprocessor import ImagePreprocessor
 from digitized_journal.ocr.ocr_engine import OCREngine
-from digitized_journal.config import IMAGES_DIR
+from digitized_journal.config import IMAGES_DIR, IMAGE_RESIZE_WIDTH
 
 # Ensure directories exist
 os.makedirs(IMAGES_DIR, exist_ok=True)
 
+@st.cache_data(max_entries=8)
+def preprocess_image(_uploaded_file, file_id: str, denoise: bool, threshold: bool, 
+                     deskew: bool) -> np.ndarray:
+    """Decode and preprocess an uploaded image, cached on the upload's ID and flags."""
+    # Decode straight from the upload's buffer rather than a bytes copy of it
+    with _uploaded_file.getbuffer() as buf:
+        encoded = np.frombuffer(buf, np.uint8)
+        gray = cv2.imdecode(encoded, cv2.IMREAD_GRAYSCALE)
+        del encoded
+        
+    if gray is None:
+        raise ValueError("Failed to decode uploaded image")
+        
+    processed_img = ImagePreprocessor.preprocess(
+        gray,
+        denoise=denoise,
+        threshold=threshold,
+        deskew=deskew
+    )
+    return np.array(processed_img)
+
+@st.cache_data(max_entries=8)
+def run_ocr(_uploaded_file, file_id: str, preprocess: bool, denoise: bool, threshold: bool, 
+            deskew: bool, lang: str, psm: int, oem: int) -> dict:
+    """Run Tesseract on an uploaded image, cached on the upload's ID and every setting."""
+    if preprocess:
+        img_for_ocr = Image.fromarray(
+            preprocess_image(_uploaded_file, file_id, denoise, threshold, deskew)
+        )
+    else:
+        _uploaded_file.seek(0)
+        img_for_ocr = Image.open(_uploaded_file)
+        
+        # Tesseract's work grows with pixel count; shrink raw images wider
+        # than the width preprocessed ones are already resized to
+        if img_for_ocr.width > IMAGE_RESIZE_WIDTH:
+            ratio = IMAGE_RESIZE_WIDTH / img_for_ocr.width
+            img_for_ocr = img_for_ocr.resize(
+                (IMAGE_RESIZE_WIDTH, max(1, int(img_for_ocr.height * ratio))), 
+                Image.LANCZOS
+            )
+            
+    return pytesseract.image_to_data(
+        img_for_ocr, 
+        lang=lang, 
+        config=f"--psm {psm} --oem {oem}",
+        output_type=pytesseract.Output.DICT
+    )
+
 st.title("OCR Optimization Tool")
 st.write("Upload a handwritten page to test different OCR settings")
 
@@ -27,14 +75,12 @@ st.write("Upload a handwritten page to test different OCR settings")
 uploaded_file = st.file_uploader("Upload image", type=["jpg", "jpeg", "png"])
 
 if uploaded_file:
-    # Save file temporarily
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-        tmp.write(uploaded_file.getvalue())
-        img_path = tmp.name
+    # The upload's ID keys the preprocessing and OCR caches, so its
+    # contents are neither copied nor hashed on every rerun
+    file_id = uploaded_file.file_id
     
     # Display original
-    original_img = Image.open(img_path)
-    st.image(original_img, caption="Original Image", use_container_width =True)
+    st.image(uploaded_file, caption="Original Image", use_container_width =True)
     
     # OCR settings
     st.subheader("OCR Settings")
@@ -68,30 +114,28 @@ if uploaded_file:
     
     if st.button("Process Image"):
         with st.spinner("Processing..."):
-            # Create preprocessor
-            preprocessor = ImagePreprocessor()
-            
             if preprocess:
-                # Process the image with selected options
-                processed_img = preprocessor.preprocess(
-                    img_path,
-                    denoise=denoise,
-                    threshold=threshold,
-                    deskew=deskew
-                )
-                
-                # Convert to numpy array for display
-                processed_np = np.array(processed_img)
+                # Cached, so only changes to the preprocessing options redo this
+                processed_np = preprocess_image(uploaded_file, file_id, denoise, threshold, deskew)
                 st.image(processed_np, caption="Processed Image", use_container_width =True)
                 
-                # Convert back to PIL for Tesseract
-                img_for_ocr = processed_img
-            else:
-                img_for_ocr = original_img
-            
-            # Run OCR with custom config
+            # Run OCR with custom config; one Tesseract run gives both the
+            # words and their confidences
             config = f"--psm {psm_mode} --oem {oem_mode}"
-            text = pytesseract.image_to_string(img_for_ocr, lang=language, config=config)
+            data = run_ocr(uploaded_file, file_id, preprocess, denoise, threshold, deskew, 
+                           language, psm_mode, oem_mode)
+            
+            # Rebuild the text line by line, skipping entries with -1 confidence
+            lines = {}
+            confidences = []
+            for word, conf, block, par, line in zip(data['text'], data['conf'], data['block_num'], 
+                                                    data['par_num'], data['line_num']):
+                conf = float(conf)
+                if conf > 0:
+                    confidences.append(conf)
+                    if word.strip():
+                        lines.setdefault((block, par, line), []).append(word)
+            text = "\n".join(" ".join(words) for words in lines.values())
             
             # Display results
             st.subheader("Extracted Text")
@@ -101,20 +145,7 @@ if uploaded_file:
             st.subheader("OCR Debug Info")
             st.code(f"Tesseract config: {config}")
             
-            # Get confidence data
-            data = pytesseract.image_to_data(
-                img_for_ocr, 
-                lang=language, 
-                config=config,
-                output_type=pytesseract.Output.DICT
-            )
-            
             # Calculate average confidence
-            confidences = [conf for conf in data['conf'] if conf > 0]
             avg_confidence = sum(confidences) / len(confidences) if confidences else 0
             
             st.metric("Average confidence", f"{avg_confidence:.2f}%")
-            
-    # Clean up temp file when done
-    if os.path.exists(img_path):
-        os.unlink(img_path)
\ No newline at end of file
@@ -1,12 +1,14 @@
 import os
 import sys
+import logging
 import streamlit as st
 from pathlib import Path
 from datetime import datetime
-import tempfile
 from PIL import Image
 import shutil
 import uuid
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
 
 # Add project root to Python path
 project_root = os.path.dirname(os.path.abspath(__file__))
@@ -17,6 +19,9 @@ from digitized_journal.database.db_interface import DatabaseManager
 from digitized_journal.database.models import Entry, Page, Tag
 from digitized_journal.ocr.ocr_engine import OCREngine
 from digitized_journal.config import IMAGES_DIR, DATA_DIR
+from digitized_journal.utils.file_utils import ensure_dir, get_thumbnail
+
+logger = logging.getLogger(__name__)
 
 # Ensure data directories exist
 os.makedirs(IMAGES_DIR, exist_ok=True)
@@ -34,38 +39,70 @@ if 'current_entry_id' not in st.session_state:
     st.session_state.current_entry_id = None
 if 'view' not in st.session_state:
     st.session_state.view = 'list'
+if 'upl_gen' not in st.session_state:
+    st.session_state.upl_gen = 0
+if 'pending_pages' not in st.session_state:
+    # Pages whose background OCR is still running, as (entry ID, future)
+    st.session_state.pending_pages = []
+if 'entries_dirty' not in st.session_state:
+    # The list view's (id, title, date) rows, reloaded only after a write
+    st.session_state.entries_dirty = True
+    st.session_state.entries_cache = []
+
+def store_ocr_text(page_id, future):
+    """Fill in a page's text once its background OCR finishes.
+    
+    Runs as a future callback, so the text is saved even if the session that
+    added the page never renders it again.
+    """
+    try:
+        text_content = future.result()
+    except Exception as e:
+        logger.error(f"OCR failed for page {page_id}: {str(e)}")
+        return
+        
+    try:
+        db_manager.update_page_text(page_id, text_content)
+    except Exception as e:
+        logger.error(f"Error saving OCR text for page {page_id}: {str(e)}")
+
+def go_to(view, entry_id=None):
+    """Switch views from a button callback, so the click's own rerun shows it."""
+    st.session_state.view = view
+    if entry_id is not None:
+        st.session_state.current_entry_id = entry_id
 
 # Sidebar navigation
 with st.sidebar:
     st.header("Navigation")
-    if st.button("New Entry"):
-        st.session_state.view = 'new'
-        st.rerun()
-    if st.button("All Entries"):
-        st.session_state.view = 'list'
-        st.rerun()
+    st.button("New Entry", on_click=go_to, args=('new',))
+    st.button("All Entries", on_click=go_to, args=('list',))
 
 # Display based on view state
 if st.session_state.view == 'list':
     # List all entries
     st.header("Journal Entries")
-    session = db_manager.get_session()
-    try:
-        entries = session.query(Entry).order_by(Entry.date.desc()).all()
-        
-        if not entries:
-            st.info("No entries found. Create your first entry!")
-        else:
-            for entry in entries:
-                with st.container(border=True):
-                    st.subheader(entry.title or "Untitled Entry")
-                    st.caption(f"Date: {entry.date.strftime('%Y-%m-%d')}")
-                    if st.button("View", key=f"view_{entry.id}"):
-                        st.session_state.current_entry_id = entry.id
-                        st.session_state.view = 'view'
-                        st.rerun()
-    finally:
-        session.close()
+    if st.session_state.entries_dirty:
+        session = db_manager.get_session()
+        try:
+            st.session_state.entries_cache = [
+                tuple(row) for row in 
+                session.query(Entry.id, Entry.title, Entry.date).order_by(Entry.date.desc())
+            ]
+            st.session_state.entries_dirty = False
+        finally:
+            session.close()
+            
+    entries = st.session_state.entries_cache
+    
+    if not entries:
+        st.info("No entries found. Create your first entry!")
+    else:
+        for entry_id, entry_title, entry_date in entries:
+            with st.container(border=True):
+                st.subheader(entry_title or "Untitled Entry")
+                st.caption(f"Date: {entry_date.strftime('%Y-%m-%d')}")
+                st.button("View", key=f"view_{entry_id}", on_click=go_to, args=('view', entry_id))
 
 elif st.session_state.view == 'new':
     # Create new entry
@@ -90,9 +127,12 @@ elif st.session_state.view == 'new':
                 
                 # Process tags
                 if tags:
-                    tag_list = [t.strip() for t in tags.split(',') if t.strip()]
+                    # Unique names in order, looked up with a single IN query
+                    tag_list = list(dict.fromkeys(t.strip() for t in tags.split(',') if t.strip()))
+                    existing = {tag.name: tag for tag in 
+                                session.query(Tag).filter(Tag.name.in_(tag_list))}
                     for tag_name in tag_list:
-                        tag = session.query(Tag).filter_by(name=tag_name).first()
+                        tag = existing.get(tag_name)
                         if not tag:
                             tag = Tag(name=tag_name)
                             session.add(tag)
@@ -100,6 +140,7 @@ elif st.session_state.view == 'new':
                 
                 session.add(entry)
                 session.commit()
+                st.session_state.entries_dirty = True
                 
                 # Set as current entry
                 st.session_state.current_entry_id = entry.id
@@ -115,8 +156,8 @@ elif st.session_state.view == 'view' and st.session_state.current_entry_id:
     session = db_manager.get_session()
     
     try:
-        # Load entry
-        entry = session.query(Entry).filter_by(id=entry_id).first()
+        # Load entry together with its pages, ordered by page number
+        entry = session.query(Entry).options(selectinload(Entry.pages)).filter_by(id=entry_id).first()
         
         if not entry:
             st.error("Entry not found")
@@ -124,8 +165,19 @@ elif st.session_state.view == 'view' and st.session_state.current_entry_id:
             st.header(entry.title or "Untitled Entry")
             st.subheader(f"Date: {entry.date.strftime('%Y-%m-%d')}")
             
-            # Load all pages for this entry
-            pages = session.query(Page).filter_by(entry_id=entry_id).order_by(Page.page_number).all()
+            # Pages still waiting for their text; finished ones were filled in
+            # by store_ocr_text
+            st.session_state.pending_pages = [
+                (pending_entry_id, future) for pending_entry_id, future in st.session_state.pending_pages 
+                if not future.done()
+            ]
+            pending = sum(1 for pending_entry_id, _ in st.session_state.pending_pages 
+                          if pending_entry_id == entry_id)
+            if pending:
+                st.info(f"Reading text from {pending} new page(s)...")
+                st.button("Refresh")
+                
+            pages = entry.pages
             
             # Show pages
             if pages:
@@ -135,8 +187,8 @@ elif st.session_state.view == 'view' and st.session_state.current_entry_id:
                         try:
                             img_path = Path(page.image_path)
                             if img_path.exists():
-                                image = Image.open(img_path)
-                                st.image(image, width=400)
+                                # A small stored thumbnail instead of decoding the full image
+                                st.image(str(get_thumbnail(img_path, 400)), width=400)
                         except Exception as e:
                             st.error(f"Error displaying image: {str(e)}")
                         
@@ -146,57 +198,62 @@ elif st.session_state.view == 'view' and st.session_state.current_entry_id:
             
             # Add new page form
             st.subheader("Add New Page")
-            uploaded_file = st.file_uploader("Upload an image", type=["jpg", "jpeg", "png"])
+            # A new key after each saved page resets the widget and drops the upload
+            uploader_key = f"upl_{st.session_state.upl_gen}"
+            uploaded_file = st.file_uploader("Upload an image", type=["jpg", "jpeg", "png"], 
+                                             key=uploader_key)
             
             if uploaded_file:
                 # Preview
-                image = Image.open(uploaded_file)
-                st.image(image, width=300, caption="Preview")
+                with Image.open(uploaded_file) as image:
+                    st.image(image, width=300, caption="Preview")
                 
                 preprocess = st.checkbox("Preprocess image", value=True)
                 
                 if st.button("Add Page"):
-                    with st.spinner("Processing..."):
+                    with st.spinner("Saving..."):
                         try:
-                            # Save temp file
-                            with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-                                tmp.write(uploaded_file.getvalue())
-                                tmp_path = tmp.name
-                            
                             # Create directory for entry
-                            entry_dir = IMAGES_DIR / str(entry_id)
-                            entry_dir.mkdir(exist_ok=True)
-                            
-                            # Copy image with unique name
-                            image_filename = f"{uuid.uuid4()}{Path(tmp_path).suffix}"
-                            target_path = entry_dir / image_filename
-                            shutil.copy2(tmp_path, target_path)
+                            entry_dir = ensure_dir(str(IMAGES_DIR / str(entry_id)))
                             
-                            # Extract text via OCR
-                            try:
-                                text_content = ocr_engine.process_image(target_path, preprocess=preprocess)
-                            except Exception as e:
-                                st.warning(f"OCR failed: {str(e)}")
-                                text_content = ""
+                            # Stream the upload straight to its final unique name
+                            target_path = entry_dir / f"{uuid.uuid4()}.jpg"
+                            uploaded_file.seek(0)
+                            with open(target_path, 'wb', buffering=1 << 20) as f:
+                                shutil.copyfileobj(uploaded_file, f, 1 << 20)
+                                
+                            # Store the display thumbnail now rather than on first view
+                            get_thumbnail(target_path, 400)
                             
-                            # Get next page number
-                            existing_pages = session.query(Page).filter_by(entry_id=entry_id).count()
-                            page_number = existing_pages + 1
+                            # Get next page number; MAX is a seek on ix_pages_entry_page
+                            last_page = session.query(func.max(Page.page_number)).filter(
+                                Page.entry_id == entry_id
+                            ).scalar()
+                            page_number = (last_page or 0) + 1
                             
-                            # Create page
+                            # Create the page now, so it is kept whatever happens to
+                            # this session; its text is filled in when OCR finishes
                             new_page = Page(
                                 entry_id=entry_id,
                                 page_number=page_number,
                                 image_path=str(target_path),
-                                text_content=text_content
+                                text_content=""
                             )
                             session.add(new_page)
                             session.commit()
                             
-                            # Clean up
-                            os.unlink(tmp_path)
+                            # Extract text via OCR in a worker process
+                            future = ocr_engine.submit_image(target_path, preprocess=preprocess)
+                            future.add_done_callback(
+                                lambda done, page_id=new_page.id: store_ocr_text(page_id, done)
+                            )
+                            st.session_state.pending_pages.append((entry_id, future))
+                            
+                            # Release the in-memory upload now that it is on disk
+                            del uploaded_file
+                            st.session_state.pop(uploader_key, None)
+                            st.session_state.upl_gen += 1
                             
-                            st.success("Page added successfully!")
                             st.rerun()
                         except Exception as e:
                             st.error(f"Error: {str(e)}")